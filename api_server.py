@@ -0,0 +1,231 @@
+import os
+import sys
+import json
+import math
+import base64
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from job_queue import JobQueue
+from gemini_client import available_model_names
+from metrics import get_metrics, span
+
+# Headless HTTP API in front of the resume pipeline.
+#
+#   python api_server.py --port 8080 --workers 4
+#
+#   POST /jobs              {"resume_base64": "...", "job_description": "...",
+#                            "critique": true, "ats_mode": "keyword", "sections": ["overall"],
+#                            "model": "<one of GEMINI_MODELS>"}
+#                           -> 202 {"job_id": "...", "status": "queued", "deduplicated": false}
+#   GET  /jobs/<id>         current status and result; ?wait=30 long-polls for a change
+#   GET  /jobs/<id>/events  server-sent events until the job is done or failed
+#   GET  /queue             queue depth per status, for autoscaling
+#   GET  /metrics           per-stage latency histograms and counters (Prometheus)
+#   GET  /health
+#
+# Jobs are stored in a SQLite queue and processed by a bounded pool of worker
+# threads, so the API stays responsive however many resumes are submitted.
+
+MAX_UPLOAD_BYTES = int(os.getenv("API_MAX_UPLOAD_MB", "10")) * 1024 * 1024
+ATS_MODES = ("keyword", "weighted")
+# Longest long-poll a client may ask for with ?wait=
+MAX_WAIT_SECONDS = 60.0
+
+
+# Function to run one job through the pipeline
+def process_job(job):
+    from resume_core import extract_text_cached, score_resume, analyze_resume, analyze_resume_sections
+
+    options = job["options"]
+    extraction_notes = []
+    resume_text = extract_text_cached(job["resume"], extraction_notes)
+    if not resume_text:
+        raise ValueError("No text could be extracted from the resume.")
+
+    result = {
+        "resume_chars": len(resume_text),
+        "extraction_notes": extraction_notes,
+        "ats": score_resume(resume_text, job["job_description"], options.get("ats_mode", "keyword")),
+    }
+    if options.get("critique"):
+        if options.get("sections"):
+            result["critique"] = analyze_resume_sections(
+                resume_text, job["job_description"], options["sections"], options.get("model")
+            )
+        else:
+            result["critique"] = analyze_resume(resume_text, job["job_description"], options.get("model"))
+    return result
+
+
+def worker_loop(queue, stop):
+    while not stop.is_set():
+        job = queue.claim(timeout=1.0)
+        if job is None:
+            continue
+        try:
+            with span("job"):
+                result = process_job(job)
+            queue.complete(job["id"], result)
+        except Exception as e:
+            print(f"Job {job['id']} failed: {e}")
+            queue.fail(job["id"], f"{type(e).__name__}: {e}")
+
+
+def parse_submission(body):
+    from resume_core import SECTIONS_BY_ID
+
+    try:
+        payload = json.loads(body)
+        resume_bytes = base64.b64decode(payload["resume_base64"], validate=True)
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"Expected JSON with a base64 'resume_base64' field ({e})")
+    if not resume_bytes.startswith(b"%PDF"):
+        raise ValueError("resume_base64 does not contain a PDF")
+    job_description = payload.get("job_description") or ""
+    if not isinstance(job_description, str):
+        raise ValueError("job_description must be a string")
+    if payload.get("ats_mode", "keyword") not in ATS_MODES:
+        raise ValueError(f"ats_mode must be one of {', '.join(ATS_MODES)}")
+
+    options = {
+        "critique": bool(payload.get("critique", False)),
+        "ats_mode": payload.get("ats_mode", "keyword"),
+    }
+    sections = payload.get("sections")
+    if sections:
+        if not isinstance(sections, list) or not all(isinstance(section, str) for section in sections):
+            raise ValueError("sections must be a list of section ids")
+        unknown = sorted(set(sections) - set(SECTIONS_BY_ID))
+        if unknown:
+            raise ValueError(f"Unknown sections {', '.join(unknown)}; expected some of {', '.join(SECTIONS_BY_ID)}")
+        options["sections"] = sorted(set(sections))
+    if payload.get("model"):
+        # Only the configured models, so clients cannot pick expensive ones
+        if payload["model"] not in available_model_names():
+            raise ValueError(f"model must be one of {', '.join(available_model_names())}")
+        options["model"] = payload["model"]
+    return resume_bytes, job_description, options
+
+
+class APIHandler(BaseHTTPRequestHandler):
+    queue = None
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_metrics(self):
+        data = get_metrics().render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/jobs":
+            return self._send_json(404, {"error": "not found"})
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0 or length > MAX_UPLOAD_BYTES * 4 // 3 + 4096:
+            return self._send_json(413, {"error": "request body missing or too large"})
+        try:
+            resume_bytes, job_description, options = parse_submission(self.rfile.read(length))
+        except ValueError as e:
+            return self._send_json(400, {"error": str(e)})
+
+        job_id, deduplicated = self.queue.submit(resume_bytes, job_description, options)
+        job = self.queue.get(job_id)
+        self._send_json(202, {"job_id": job_id, "status": job["status"], "deduplicated": deduplicated})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = [part for part in url.path.split("/") if part]
+        if parts == ["health"]:
+            return self._send_json(200, {"status": "ok"})
+        if parts == ["queue"]:
+            return self._send_json(200, self.queue.depth())
+        if parts == ["metrics"]:
+            return self._send_metrics()
+        if len(parts) == 2 and parts[0] == "jobs":
+            return self._get_job(parts[1], parse_qs(url.query))
+        if len(parts) == 3 and parts[0] == "jobs" and parts[2] == "events":
+            return self._stream_job(parts[1])
+        self._send_json(404, {"error": "not found"})
+
+    def _get_job(self, job_id, query):
+        job = self.queue.get(job_id)
+        if job is None:
+            return self._send_json(404, {"error": "unknown job"})
+        try:
+            wait = float(query.get("wait", ["0"])[0] or 0)
+        except ValueError:
+            return self._send_json(400, {"error": "wait must be a number of seconds"})
+        if math.isnan(wait):
+            return self._send_json(400, {"error": "wait must be a number of seconds"})
+        wait = max(0.0, min(wait, MAX_WAIT_SECONDS))
+        if wait > 0 and job["status"] in ("queued", "running"):
+            job = self.queue.wait_for_change(job_id, job["status"], wait)
+        self._send_json(200, job)
+
+    # Server-sent events: one event per status change until the job finishes
+    def _stream_job(self, job_id):
+        job = self.queue.get(job_id)
+        if job is None:
+            return self._send_json(404, {"error": "unknown job"})
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        try:
+            while True:
+                self.wfile.write(f"event: {job['status']}\ndata: {json.dumps(job)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+                if job["status"] in ("done", "failed"):
+                    return
+                job = self.queue.wait_for_change(job_id, job["status"], 15.0)
+        except (BrokenPipeError, ConnectionResetError):
+            return
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the resume pipeline over HTTP.")
+    parser.add_argument("--host", default=os.getenv("API_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("API_PORT", "8080")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("API_WORKERS", "4")))
+    parser.add_argument("--queue", default=os.getenv("API_QUEUE_PATH", os.path.join(".cache", "jobs.sqlite3")))
+    parser.add_argument("--max-attempts", type=int, default=int(os.getenv("API_MAX_ATTEMPTS", "3")),
+                        help="runs of a job interrupted by crashes before it is marked failed")
+    args = parser.parse_args(argv)
+
+    queue = JobQueue(args.queue, max_attempts=args.max_attempts)
+    APIHandler.queue = queue
+    stop = threading.Event()
+    workers = [
+        threading.Thread(target=worker_loop, args=(queue, stop), name=f"api-worker-{i}", daemon=True)
+        for i in range(args.workers)
+    ]
+    for worker in workers:
+        worker.start()
+
+    server = ThreadingHTTPServer((args.host, args.port), APIHandler)
+    server.daemon_threads = True
+    print(f"Serving on http://{args.host}:{args.port} with {args.workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
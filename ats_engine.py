@@ -0,0 +1,83 @@
+import re
+
+import numpy as np
+
+# Batch ATS scoring: one job description against many resumes.
+#
+# The job description is tokenized once into a vocabulary. Each resume is
+# reduced to the vocabulary ids it contains, and the whole batch is stored as
+# a sparse CSR-style presence matrix (indptr/indices arrays). Scores are then
+# computed for every resume at once with NumPy. With uniform weights the
+# result is identical to calculate_ats_score; other weights (e.g. IDF) plug
+# into the same matrix.
+#
+# Tokenizing is the expensive part. For ASCII text (nearly every resume) one
+# bytes.translate call lowercases the text and turns every non-word byte into
+# a space, so split() yields the same words as WORD_RE without the regex
+# engine; other text goes through WORD_RE.
+
+WORD_RE = re.compile(r'\b\w+\b')
+WORD_BYTES = frozenset(b"abcdefghijklmnopqrstuvwxyz0123456789_")
+ASCII_WORDS_TABLE = bytes(
+    byte if byte in WORD_BYTES else byte + 32 if 65 <= byte <= 90 else 32 for byte in range(256)
+)
+
+
+def tokenize(text):
+    return set(WORD_RE.findall(text.lower())) if text else set()
+
+
+class ATSScorer:
+    def __init__(self, job_description, weights=None):
+        self.job_description = job_description or ""
+        self.terms = sorted(tokenize(self.job_description))
+        self.vocabulary = {term: index for index, term in enumerate(self.terms)}
+        self._term_set = frozenset(self.terms)
+        self._ascii_vocabulary = {term.encode("ascii"): index for term, index in self.vocabulary.items()
+                                  if term.isascii()}
+        self._ascii_term_set = frozenset(self._ascii_vocabulary)
+        if weights is None:
+            self.weights = np.ones(len(self.terms), dtype=np.float64)
+        else:
+            self.weights = np.array([weights.get(term, 1.0) for term in self.terms], dtype=np.float64)
+        self.total_weight = float(self.weights.sum())
+
+    # Function to list the vocabulary ids of the JD terms a resume contains
+    def term_ids(self, text):
+        if not text:
+            return []
+        if text.isascii():
+            words = text.encode("ascii").translate(ASCII_WORDS_TABLE).split()
+            return [self._ascii_vocabulary[term] for term in self._ascii_term_set.intersection(words)]
+        return [self.vocabulary[term] for term in self._term_set.intersection(WORD_RE.findall(text.lower()))]
+
+    # Function to turn resumes into the CSR presence matrix over the JD vocabulary
+    def encode_many(self, resume_texts):
+        indptr = [0]
+        indices = []
+        for text in resume_texts:
+            indices.extend(self.term_ids(text))
+            indptr.append(len(indices))
+        return np.array(indptr, dtype=np.int64), np.array(indices, dtype=np.int64)
+
+    # Function to score an encoded batch; returns a float array of percentages
+    def scores_from_matrix(self, indptr, indices):
+        rows = len(indptr) - 1
+        if rows == 0 or not self.terms:
+            return np.zeros(rows, dtype=np.float64)
+        # Sum the weights of the matched terms row by row
+        row_ids = np.repeat(np.arange(rows), np.diff(indptr))
+        matched = np.bincount(row_ids, weights=self.weights[indices], minlength=rows)
+        return (matched / self.total_weight) * 100
+
+    # Function to score many resumes; same values as calculate_ats_score for uniform weights
+    def score_many(self, resume_texts):
+        resume_texts = list(resume_texts)
+        if not self.terms:
+            return [0] * len(resume_texts)
+        raw = self.scores_from_matrix(*self.encode_many(resume_texts))
+        # Python's round keeps results bit-for-bit equal to calculate_ats_score
+        return [round(float(score), 2) if text else 0 for text, score in zip(resume_texts, raw)]
+
+    def score(self, resume_text):
+        return self.score_many([resume_text])[0]
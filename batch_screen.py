@@ -0,0 +1,238 @@
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# Headless batch screening: score every PDF in a folder against one job description.
+#
+#   python batch_screen.py resumes/ --jd job.txt --output results.jsonl
+#   python batch_screen.py resumes/ --jd job.txt --output results.csv --critique --critique-concurrency 2
+#
+# Extraction and ATS scoring run in a process pool, a chunk of files per task,
+# so each worker scores its chunk in one vectorized ATSScorer.score_many call;
+# each result is appended to the output file as soon as its chunk is done. Re-running with the same
+# output file skips resumes that already have a result, so an interrupted run
+# picks up where it stopped. Resumes whose row records an error (a file that
+# could not be read, a failed or skipped critique) are tried again, and the
+# new row is appended after the old one.
+
+CSV_FIELDS = [
+    "file", "ats_score", "text_chars", "extract_seconds", "score_seconds",
+    "critique_seconds", "critique", "error",
+]
+
+
+_scorer = None
+
+
+def _init_worker(job_description):
+    global _scorer
+    from ats_engine import ATSScorer
+
+    # Each batch worker is already one of many processes, so OCR runs inline in
+    # the isolated extraction worker, which keeps its time and memory budget
+    os.environ["OCR_WORKERS"] = "1"
+    os.environ["EXTRACTION_OCR_WORKERS"] = "1"
+    # Tokenize the job description once per worker instead of once per resume
+    _scorer = ATSScorer(job_description)
+
+
+# Function run in a worker process: extract a chunk of resumes, then score them together.
+# Returns [(record, text)] in the order of paths; score_seconds is the chunk's share per resume.
+def screen_files(paths):
+    from resume_core import extract_text_cached
+
+    results = []
+    for path in paths:
+        record = {"file": path, "ats_score": None, "text_chars": 0,
+                  "extract_seconds": 0.0, "score_seconds": 0.0, "error": None}
+        try:
+            start = time.perf_counter()
+            with open(path, "rb") as f:
+                text = extract_text_cached(f.read())
+            record["extract_seconds"] = round(time.perf_counter() - start, 4)
+            record["text_chars"] = len(text)
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+            text = ""
+        results.append((record, text))
+
+    extracted = [(record, text) for record, text in results if not record["error"]]
+    start = time.perf_counter()
+    try:
+        scores = _scorer.score_many(text for _, text in extracted)
+    except Exception as e:
+        for record, _ in extracted:
+            record["error"] = f"{type(e).__name__}: {e}"
+        return results
+    share = round((time.perf_counter() - start) / max(len(extracted), 1), 6)
+    for (record, _), score in zip(extracted, scores):
+        record["ats_score"], record["score_seconds"] = score, share
+    return results
+
+
+def critique_resume(text, job_description):
+    from resume_core import analyze_resume
+
+    start = time.perf_counter()
+    critique = analyze_resume(text, job_description)
+    if isinstance(critique, dict):
+        raise ValueError(critique.get("error", "analysis failed"))
+    return critique, round(time.perf_counter() - start, 4)
+
+
+def find_resumes(folder, recursive):
+    paths = []
+    for root, dirs, files in os.walk(folder):
+        paths.extend(os.path.join(root, name) for name in files if name.lower().endswith(".pdf"))
+        if not recursive:
+            break
+    return sorted(paths)
+
+
+# Function to read which files an earlier run finished without an error
+def finished_files(output_path):
+    if not os.path.exists(output_path):
+        return set()
+    with open(output_path, "r", encoding="utf-8", newline="") as f:
+        if output_path.endswith(".csv"):
+            return {row["file"] for row in csv.DictReader(f) if row.get("file") and not row.get("error")}
+        done = set()
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A line cut short by an interruption; that file is redone
+                continue
+            if isinstance(record, dict) and record.get("file") and not record.get("error"):
+                done.add(record["file"])
+        return done
+
+
+class ResultWriter:
+    def __init__(self, output_path):
+        self.is_csv = output_path.endswith(".csv")
+        new_file = not os.path.exists(output_path) or os.path.getsize(output_path) == 0
+        self._file = open(output_path, "a", encoding="utf-8", newline="")
+        if self.is_csv:
+            self._writer = csv.DictWriter(self._file, fieldnames=CSV_FIELDS, extrasaction="ignore")
+            if new_file:
+                self._writer.writeheader()
+
+    def write(self, record):
+        if self.is_csv:
+            self._writer.writerow(record)
+        else:
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        # Flush per record so an interruption never loses finished work
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a folder of resumes against a job description.")
+    parser.add_argument("folder", help="directory containing resume PDFs")
+    parser.add_argument("--jd", required=True, help="text file with the job description")
+    parser.add_argument("--output", default="results.jsonl", help="results file (.jsonl or .csv)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="extraction processes")
+    parser.add_argument("--recursive", action="store_true", help="include PDFs in subdirectories")
+    parser.add_argument("--critique", action="store_true", help="also request a Gemini critique per resume")
+    parser.add_argument("--critique-concurrency", type=int,
+                        default=int(os.getenv("GEMINI_MAX_CONCURRENCY", "4")),
+                        help="maximum Gemini critiques in flight")
+    parser.add_argument("--chunk-size", type=int, default=16, help="resumes per worker task, scored together")
+    args = parser.parse_args(argv)
+
+    with open(args.jd, "r", encoding="utf-8") as f:
+        job_description = f.read()
+
+    done = finished_files(args.output)
+    todo = [path for path in find_resumes(args.folder, args.recursive) if path not in done]
+    print(f"{len(done)} already screened, {len(todo)} to go.", file=sys.stderr)
+    if not todo:
+        return 0
+
+    writer = ResultWriter(args.output)
+    totals = {"extract_seconds": 0.0, "score_seconds": 0.0, "critique_seconds": 0.0}
+    counts = {"screened": 0, "errors": 0, "critiques": 0}
+    started = time.perf_counter()
+
+    def finish(record):
+        writer.write(record)
+        counts["screened"] += 1
+        if record.get("error"):
+            counts["errors"] += 1
+        for stage in totals:
+            totals[stage] += record.get(stage) or 0.0
+        if counts["screened"] % 100 == 0:
+            rate = counts["screened"] / (time.perf_counter() - started)
+            print(f"{counts['screened']}/{len(todo)} screened ({rate:.1f}/s)", file=sys.stderr)
+
+    pending_files = iter(todo)
+    in_flight = {}
+    critiques = {}
+    critique_pool = ThreadPoolExecutor(max_workers=max(1, args.critique_concurrency)) if args.critique else None
+
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                                 initargs=(job_description,)) as pool:
+            def submit_next():
+                paths = list(itertools.islice(pending_files, max(1, args.chunk_size)))
+                if paths:
+                    in_flight[pool.submit(screen_files, paths)] = paths
+
+            # Keep a bounded number of chunks queued so memory does not grow with the folder size
+            for _ in range(args.workers * 2):
+                submit_next()
+
+            while in_flight or critiques:
+                finished, _ = wait(list(in_flight) + list(critiques), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    if future in in_flight:
+                        paths = in_flight.pop(future)
+                        try:
+                            results = future.result()
+                        except Exception as e:
+                            # The worker died; every file of the chunk is retried on the next run
+                            results = [({"file": path, "error": f"{type(e).__name__}: {e}"}, "") for path in paths]
+                        submit_next()
+                        for record, text in results:
+                            if critique_pool is not None and text and not record.get("error"):
+                                critiques[critique_pool.submit(critique_resume, text, job_description)] = record
+                            else:
+                                finish(record)
+                    else:
+                        record = critiques.pop(future)
+                        try:
+                            record["critique"], record["critique_seconds"] = future.result()
+                            counts["critiques"] += 1
+                        except Exception as e:
+                            record["error"] = f"critique failed: {type(e).__name__}: {e}"
+                        finish(record)
+    except KeyboardInterrupt:
+        print("Interrupted; re-run the same command to resume.", file=sys.stderr)
+    finally:
+        writer.close()
+        if critique_pool is not None:
+            critique_pool.shutdown(wait=False, cancel_futures=True)
+
+    elapsed = time.perf_counter() - started
+    screened = counts["screened"] or 1
+    print(f"Screened {counts['screened']} resumes in {elapsed:.1f}s "
+          f"({counts['screened'] / elapsed if elapsed else 0:.2f} resumes/s), {counts['errors']} errors.")
+    print(f"  extraction: {totals['extract_seconds']:.1f}s total, {totals['extract_seconds'] / screened:.3f}s avg")
+    print(f"  ATS scoring: {totals['score_seconds']:.1f}s total, {totals['score_seconds'] / screened:.4f}s avg")
+    if args.critique:
+        critiqued = counts["critiques"] or 1
+        print(f"  critiques: {counts['critiques']} done, {totals['critique_seconds'] / critiqued:.1f}s avg")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
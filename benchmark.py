@@ -0,0 +1,469 @@
+import os
+import sys
+import json
+import time
+import math
+import random
+import shutil
+import argparse
+import platform
+import importlib.util
+import itertools
+import tracemalloc
+
+# Reproducible benchmark for the resume pipeline.
+#
+# Generates a seeded corpus of text PDFs and scanned (image-only) PDFs with
+# varying page counts, then times each stage: extraction, ATS scoring and the
+# Gemini critique. Gemini is replaced by the local fake backend
+# (fake_gemini.py) with configurable latency, so no API key or network is
+# needed. Each stage reports throughput, p50/p95 latency and peak Python
+# memory; results can be saved as a baseline and later runs compared against
+# it, exiting non-zero on a regression. A stage is only compared when both
+# runs timed it at least --min-samples times, so a single slow call cannot
+# fail the run.
+#
+#   python benchmark.py --save-baseline benchmarks/baseline.json
+#   python benchmark.py --baseline benchmarks/baseline.json --tolerance 0.25
+#
+# Text PDFs need pdfplumber or poppler to extract, scanned PDFs need Pillow to
+# generate and tesseract/pdftoppm to extract; stages whose dependencies are
+# missing are reported as skipped.
+
+FIRST_NAMES = ["Alex", "Priya", "Jordan", "Mei", "Samuel", "Fatima", "Lukas", "Ana", "Kwame", "Yuki"]
+LAST_NAMES = ["Sharma", "Okafor", "Lindqvist", "Chen", "Garcia", "Novak", "Haddad", "Kim", "Murphy", "Silva"]
+COMPANIES = ["Northwind", "Globex", "Initech", "Umbrella Labs", "Stark Analytics", "Wayne Systems", "Acme Cloud"]
+ROLES = ["Software Engineer", "Data Scientist", "Backend Developer", "DevOps Engineer", "Product Analyst"]
+VERBS = ["Built", "Designed", "Led", "Migrated", "Automated", "Optimized", "Launched", "Scaled", "Reduced"]
+OBJECTS = ["a billing service", "the data pipeline", "CI/CD workflows", "an internal dashboard",
+           "the search backend", "a recommendation model", "monitoring and alerting", "the public API"]
+RESULTS = ["cutting latency by {n}%", "saving {n} hours per week", "serving {n}k daily users",
+           "improving conversion by {n}%", "reducing cloud spend by {n}%"]
+
+LINES_PER_PAGE = 48
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792
+
+
+# Function to write a resume of roughly the given number of pages
+def resume_lines(rng, skills, pages):
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    lines = [name, f"{rng.choice(ROLES)} | {name.split()[0].lower()}@example.com | +1 555 0100", "",
+             "SUMMARY", f"{rng.choice(ROLES)} with {rng.randint(2, 15)} years of experience in "
+             + ", ".join(rng.sample(skills, 3)) + ".", "", "SKILLS", ", ".join(rng.sample(skills, 12)), "",
+             "EXPERIENCE"]
+    while len(lines) < pages * LINES_PER_PAGE - 6:
+        lines += ["", f"{rng.choice(ROLES)}, {rng.choice(COMPANIES)} ({rng.randint(2010, 2024)})"]
+        for _ in range(rng.randint(3, 6)):
+            result = rng.choice(RESULTS).format(n=rng.randint(5, 90))
+            lines.append(f"- {rng.choice(VERBS)} {rng.choice(OBJECTS)} with {rng.choice(skills)}, {result}")
+    lines += ["", "EDUCATION", f"B.Sc. Computer Science, State University ({rng.randint(2005, 2020)})"]
+    return lines
+
+
+def job_description(rng, skills):
+    wanted = rng.sample(skills, 10)
+    return (
+        f"We are hiring a {rng.choice(ROLES)} to join {rng.choice(COMPANIES)}.\n"
+        f"Requirements: {', '.join(wanted[:6])}.\n"
+        f"Nice to have: {', '.join(wanted[6:])}.\n"
+        "You will design, build and operate services used by millions of customers."
+    )
+
+
+def _pdf_string(text):
+    text = text.encode("latin-1", "replace").decode("latin-1")
+    return "(" + text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ")"
+
+
+# Function to write a minimal text PDF (Helvetica, one content stream per page) without extra dependencies
+def write_text_pdf(path, pages, font_size=10, leading=14):
+    objects = []
+    page_ids = []
+    # Object 1 is the catalog, 2 the page tree, 3 the font; pages follow
+    for index, lines in enumerate(pages):
+        page_id = 4 + index * 2
+        page_ids.append(page_id)
+        operations = [f"BT /F1 {font_size} Tf {leading} TL 54 {PAGE_HEIGHT - 60} Td"]
+        operations += [f"{_pdf_string(line)} Tj T*" for line in lines]
+        operations.append("ET")
+        content = "\n".join(operations).encode("latin-1")
+        objects.append((page_id, (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}]"
+            f" /Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>"
+        ).encode("latin-1")))
+        objects.append((page_id + 1, b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream"))
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects = [
+        (1, b"<< /Type /Catalog /Pages 2 0 R >>"),
+        (2, f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode("latin-1")),
+        (3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"),
+    ] + objects
+
+    data = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for object_id, body in objects:
+        offsets[object_id] = len(data)
+        data += b"%d 0 obj\n" % object_id + body + b"\nendobj\n"
+    xref = len(data)
+    data += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for object_id in range(1, len(objects) + 1):
+        data += b"%010d 00000 n \n" % offsets[object_id]
+    data += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+# Function to write a scanned-looking PDF: every page is an image with no text layer
+def write_image_pdf(path, pages, dpi=150):
+    from PIL import Image, ImageDraw, ImageFont
+
+    try:
+        font = ImageFont.load_default(size=int(dpi * 10 / 72))
+    except TypeError:
+        # Pillow < 10.1 only has the small bitmap font
+        font = ImageFont.load_default()
+    width, height = int(PAGE_WIDTH * dpi / 72), int(PAGE_HEIGHT * dpi / 72)
+    images = []
+    for lines in pages:
+        image = Image.new("L", (width, height), 255)
+        draw = ImageDraw.Draw(image)
+        y = int(60 * dpi / 72)
+        for line in lines:
+            draw.text((int(54 * dpi / 72), y), line, fill=0, font=font)
+            y += int(14 * dpi / 72)
+        images.append(image)
+    images[0].save(path, "PDF", resolution=dpi, save_all=True, append_images=images[1:])
+
+
+# Function to build (or reuse) the corpus; returns the manifest
+def generate_corpus(directory, documents=8, scanned_share=0.25, seed=7):
+    from skill_matching import get_skill_matcher
+
+    params = {"documents": documents, "scanned_share": scanned_share, "seed": seed}
+    manifest_path = os.path.join(directory, "manifest.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest["params"] == params:
+            return manifest
+        shutil.rmtree(directory)
+    os.makedirs(directory, exist_ok=True)
+
+    rng = random.Random(seed)
+    skills = get_skill_matcher().skills
+    scanned_count = round(documents * scanned_share)
+    manifest = {"params": params, "job_description": job_description(rng, skills), "documents": [], "skipped": []}
+    for index in range(documents):
+        scanned = index >= documents - scanned_count
+        pages = (1, 2)[index % 2] if scanned else (1, 2, 3, 5)[index % 4]
+        lines = resume_lines(rng, skills, pages)
+        page_lines = [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)]
+        name = f"{'scanned' if scanned else 'text'}_{index:03d}"
+        path = os.path.join(directory, f"{name}.pdf")
+        try:
+            (write_image_pdf if scanned else write_text_pdf)(path, page_lines)
+        except ImportError as e:
+            manifest["skipped"].append(f"{name}: {e}")
+            continue
+        # Reference transcript, also usable with ocr_benchmark.py
+        with open(os.path.join(directory, f"{name}.txt"), "w", encoding="utf-8") as f:
+            f.write("\n".join(lines))
+        manifest["documents"].append({
+            "name": name, "kind": "scanned" if scanned else "text", "pages": len(page_lines),
+            "path": path, "text": "\n".join(lines),
+        })
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    return manifest
+
+
+class SkipStage(Exception):
+    pass
+
+
+def percentile(sorted_values, percent):
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+# Function to time fn over the inputs, then measure peak Python memory in a separate pass
+def measure(fn, inputs, repeats, items_per_call=1):
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(repeats):
+        for item in inputs:
+            start = time.perf_counter()
+            fn(item)
+            latencies.append(time.perf_counter() - start)
+    wall = time.perf_counter() - started
+
+    # tracemalloc slows allocation-heavy code down, so it is kept out of the timed pass
+    tracemalloc.start()
+    try:
+        for item in inputs:
+            fn(item)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "calls": len(latencies),
+        "throughput_per_s": round(len(latencies) * items_per_call / wall, 3) if wall else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "peak_mb": round(peak / 1024 / 1024, 3),
+    }
+
+
+def _read_pdfs(manifest, kind):
+    documents = [document for document in manifest["documents"] if document["kind"] == kind]
+    if not documents:
+        raise SkipStage(f"no {kind} PDFs in the corpus")
+    blobs = []
+    for document in documents:
+        with open(document["path"], "rb") as f:
+            blobs.append(f.read())
+    return blobs
+
+
+# Function to skip an extraction stage whose engines are missing. Extraction
+# falls back quietly and returns empty text, which would otherwise be timed as
+# a fast successful run.
+def _require_extraction(fn, blobs, scanned=False):
+    from extraction_engines import available_engines
+
+    if scanned:
+        missing = [binary for binary in ("tesseract", "pdftoppm") if not shutil.which(binary)]
+        missing += [module for module in ("pdf2image", "pytesseract") if importlib.util.find_spec(module) is None]
+    else:
+        missing = [] if available_engines() else ["pdfplumber or poppler"]
+    if missing:
+        raise SkipStage(f"{', '.join(missing)} not installed")
+    if not fn(blobs[0]).strip():
+        raise SkipStage("extraction returned no text")
+
+
+# Each stage setup returns (fn, inputs, items_per_call) or raises SkipStage
+def build_stages(manifest):
+    texts = [document["text"] for document in manifest["documents"]]
+    jd = manifest["job_description"]
+    nonce = itertools.count()
+
+    def extract_text():
+        from resume_core import extract_text_from_pdf
+        blobs = _read_pdfs(manifest, "text")
+        _require_extraction(extract_text_from_pdf, blobs)
+        return extract_text_from_pdf, blobs, 1
+
+    def extract_scanned():
+        from resume_core import extract_text_from_pdf
+        blobs = _read_pdfs(manifest, "scanned")
+        _require_extraction(extract_text_from_pdf, blobs, scanned=True)
+        return extract_text_from_pdf, blobs, 1
+
+    def extract_cached():
+        from resume_core import extract_text_cached
+        blobs = _read_pdfs(manifest, "text")
+        _require_extraction(extract_text_cached, blobs)
+        for blob in blobs:
+            extract_text_cached(blob)
+        return extract_text_cached, blobs, 1
+
+    def ats_keyword():
+        from resume_core import calculate_ats_score
+        return lambda text: calculate_ats_score(text, jd), texts, 1
+
+    def ats_weighted():
+        from skill_matching import weighted_ats_score
+        return lambda text: weighted_ats_score(text, jd), texts, 1
+
+    def ats_batch():
+        from ats_engine import ATSScorer
+        scorer = ATSScorer(jd)
+        # Several batches per repeat, so the stage has enough samples to compare
+        return scorer.score_many, [texts] * 10, len(texts)
+
+    def analyze():
+        from resume_core import analyze_resume
+        # A fresh job description suffix per call keeps every call a cache miss
+        return lambda text: analyze_resume(text, f"{jd}\n#{next(nonce)}"), texts, 1
+
+    def analyze_cached():
+        from resume_core import analyze_resume
+        for text in texts:
+            analyze_resume(text, jd)
+        return lambda text: analyze_resume(text, jd), texts, 1
+
+    def stream_first_chunk():
+        from resume_core import stream_resume_analysis
+
+        def first_chunk(text):
+            stream = stream_resume_analysis(text, jd)
+            next(stream)
+            stream.close()
+        return first_chunk, texts, 1
+
+    def stream_full():
+        from resume_core import stream_resume_analysis
+        return lambda text: "".join(stream_resume_analysis(text, jd)), texts, 1
+
+    return [
+        ("extract_text_pdf", extract_text),
+        ("extract_scanned_pdf", extract_scanned),
+        ("extract_cached", extract_cached),
+        ("ats_keyword", ats_keyword),
+        ("ats_weighted", ats_weighted),
+        ("ats_batch", ats_batch),
+        ("analyze", analyze),
+        ("analyze_cached", analyze_cached),
+        ("stream_first_chunk", stream_first_chunk),
+        ("stream_full", stream_full),
+    ]
+
+
+# Function to point caches at a scratch directory and Gemini at the fake backend.
+# Must run before the pipeline modules are imported.
+def configure_environment(workdir, args):
+    os.environ["GEMINI_BACKEND"] = "fake"
+    os.environ["FAKE_GEMINI_LATENCY"] = str(args.fake_latency)
+    os.environ["FAKE_GEMINI_CHUNK_DELAY"] = str(args.fake_chunk_delay)
+    os.environ["FAKE_GEMINI_CHUNKS"] = str(args.fake_chunks)
+    # The rate limiter would otherwise dominate the critique timings
+    os.environ["GEMINI_RATE_PER_MINUTE"] = "1000000"
+    os.environ["GEMINI_BURST"] = "1000"
+    os.environ["LLM_CACHE_PATH"] = os.path.join(workdir, "llm_cache.sqlite3")
+    os.environ["EXTRACTION_CACHE_DIR"] = os.path.join(workdir, "extraction")
+    if args.ocr_workers:
+        os.environ["OCR_WORKERS"] = str(args.ocr_workers)
+
+
+def run(manifest, stages, repeats, only=None):
+    results = {}
+    for name, setup in stages:
+        if only and name not in only:
+            continue
+        try:
+            fn, inputs, items_per_call = setup()
+            results[name] = measure(fn, inputs, repeats, items_per_call)
+        except (SkipStage, ImportError) as e:
+            results[name] = {"skipped": str(e)}
+        print(f"{name}: {json.dumps(results[name])}", file=sys.stderr)
+    return results
+
+
+# Function to list regressions: p50/p95 or peak memory above baseline by more than tolerance.
+# Returns (regressions, stages with too few samples in either run to compare).
+def compare(stages, baseline_stages, tolerance, min_delta_ms, min_samples):
+    regressions = []
+    unchecked = []
+    for name, current in stages.items():
+        base = baseline_stages.get(name)
+        if not base or "skipped" in base or "skipped" in current:
+            continue
+        if min(current["calls"], base["calls"]) < min_samples:
+            unchecked.append(name)
+            continue
+        for metric in ("p50_ms", "p95_ms"):
+            if current[metric] > base[metric] * (1 + tolerance) and current[metric] - base[metric] > min_delta_ms:
+                regressions.append(f"{name} {metric}: {base[metric]:.2f} -> {current[metric]:.2f}")
+        if current["peak_mb"] > base["peak_mb"] * (1 + tolerance) and current["peak_mb"] - base["peak_mb"] > 1:
+            regressions.append(f"{name} peak_mb: {base['peak_mb']:.2f} -> {current['peak_mb']:.2f}")
+    return regressions, unchecked
+
+
+def print_table(stages, baseline_stages=None):
+    print(f"{'stage':<22} {'calls':>6} {'items/s':>10} {'p50 ms':>10} {'p95 ms':>10} {'peak MB':>9} {'p50 vs base':>12}")
+    for name, result in stages.items():
+        if "skipped" in result:
+            print(f"{name:<22} skipped: {result['skipped']}")
+            continue
+        change = ""
+        base = (baseline_stages or {}).get(name)
+        if base and "skipped" not in base and base["p50_ms"]:
+            change = f"{(result['p50_ms'] / base['p50_ms'] - 1) * 100:+.1f}%"
+        print(f"{name:<22} {result['calls']:>6} {result['throughput_per_s']:>10.1f} {result['p50_ms']:>10.2f} "
+              f"{result['p95_ms']:>10.2f} {result['peak_mb']:>9.2f} {change:>12}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark extraction, ATS scoring and the critique offline.")
+    parser.add_argument("--workdir", default=os.path.join(".cache", "benchmark"),
+                        help="scratch directory for the corpus and caches")
+    parser.add_argument("--documents", type=int, default=8)
+    parser.add_argument("--scanned-share", type=float, default=0.25)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--stages", nargs="+", help="run only these stages")
+    parser.add_argument("--fake-latency", type=float, default=0.2, help="seconds before the fake model's first token")
+    parser.add_argument("--fake-chunk-delay", type=float, default=0.02)
+    parser.add_argument("--fake-chunks", type=int, default=8)
+    parser.add_argument("--ocr-workers", type=int, default=0, help="OCR_WORKERS for the run (default: environment)")
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--save-baseline", help="write the results as the new baseline")
+    parser.add_argument("--baseline", help="compare against this baseline and exit 1 on a regression")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown (0.2 = 20%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="ignore slowdowns smaller than this")
+    parser.add_argument("--min-samples", type=int, default=10,
+                        help="timed calls a stage needs in both runs to be compared")
+    args = parser.parse_args(argv)
+
+    # Fresh caches every run; the corpus is reused when its parameters match
+    for name in ("llm_cache.sqlite3", "llm_cache.sqlite3-wal", "llm_cache.sqlite3-shm"):
+        if os.path.exists(os.path.join(args.workdir, name)):
+            os.remove(os.path.join(args.workdir, name))
+    shutil.rmtree(os.path.join(args.workdir, "extraction"), ignore_errors=True)
+    configure_environment(args.workdir, args)
+
+    manifest = generate_corpus(os.path.join(args.workdir, "corpus"), args.documents, args.scanned_share, args.seed)
+    for skipped in manifest["skipped"]:
+        print(f"Corpus: skipped {skipped}", file=sys.stderr)
+
+    from extraction_engines import available_engines
+
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "corpus": manifest["params"],
+            "pages": sum(document["pages"] for document in manifest["documents"]),
+            "repeats": args.repeats,
+            "extraction_engines": available_engines(),
+            "fake_gemini": {"latency": args.fake_latency, "chunk_delay": args.fake_chunk_delay,
+                            "chunks": args.fake_chunks},
+        },
+        "stages": run(manifest, build_stages(manifest), args.repeats, args.stages),
+    }
+
+    baseline_stages = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline_stages = json.load(f)["stages"]
+    print_table(results["stages"], baseline_stages)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+
+    if baseline_stages is not None:
+        regressions, unchecked = compare(results["stages"], baseline_stages, args.tolerance,
+                                         args.min_delta_ms, args.min_samples)
+        if unchecked:
+            print(f"\nNot compared, fewer than {args.min_samples} samples: {', '.join(unchecked)}")
+        if regressions:
+            print("\nRegressions against the baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print("\nNo regressions against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
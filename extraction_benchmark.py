@@ -0,0 +1,103 @@
+import os
+import sys
+import time
+import argparse
+from difflib import SequenceMatcher
+
+from extraction_engines import ENGINES, available_engines, extract_text_layer
+
+# Compare text-layer extraction engines for speed and fidelity.
+#
+# The corpus directory holds PDFs, optionally next to reference transcripts
+# with the same name (resume.pdf + resume.txt). Every engine reads every PDF;
+# the table reports milliseconds per page and character similarity against
+# the reference text. "auto" is the per-document choice the app makes, and
+# the last column shows which engine it picked how often. Without a corpus
+# directory the synthetic corpus from benchmark.py is generated and used.
+#
+#   python extraction_benchmark.py corpus/ --engines pdfium pdftotext pdfplumber auto
+
+
+def normalize(text):
+    return " ".join(text.lower().split())
+
+
+def similarity(reference, text):
+    return SequenceMatcher(None, reference, normalize(text), autojunk=False).ratio()
+
+
+def load_corpus(corpus_dir):
+    corpus = []
+    for name in sorted(os.listdir(corpus_dir)):
+        if not name.lower().endswith(".pdf"):
+            continue
+        with open(os.path.join(corpus_dir, name), "rb") as f:
+            pdf_bytes = f.read()
+        reference_path = os.path.join(corpus_dir, os.path.splitext(name)[0] + ".txt")
+        reference = None
+        if os.path.exists(reference_path):
+            with open(reference_path, "r", encoding="utf-8") as f:
+                reference = normalize(f.read())
+        corpus.append((name, pdf_bytes, reference))
+    return corpus
+
+
+# Function to run one engine over the corpus; returns a result row
+def run_engine(engine, corpus, repeats):
+    row = {"engine": engine, "pages": 0, "seconds": 0.0, "similarities": [], "failures": 0, "chosen": {}}
+    for name, pdf_bytes, reference in corpus:
+        texts, chosen = [], None
+        for _ in range(repeats):
+            start = time.perf_counter()
+            texts, _, chosen = extract_text_layer(pdf_bytes, engine)
+            row["seconds"] += time.perf_counter() - start
+        if chosen is None:
+            row["failures"] += 1
+            continue
+        row["pages"] += len(texts) * repeats
+        row["chosen"][chosen] = row["chosen"].get(chosen, 0) + 1
+        if reference is not None:
+            row["similarities"].append(similarity(reference, "\n".join(texts)))
+    return row
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare PDF text extraction engines.")
+    parser.add_argument("corpus", nargs="?", help="directory of PDFs with optional .txt references "
+                                                  "(default: the synthetic benchmark corpus)")
+    parser.add_argument("--engines", nargs="+", default=available_engines() + ["auto"],
+                        choices=list(ENGINES) + ["auto"])
+    parser.add_argument("--repeats", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    corpus_dir = args.corpus
+    if corpus_dir is None:
+        from benchmark import generate_corpus
+
+        corpus_dir = os.path.join(".cache", "benchmark", "corpus")
+        generate_corpus(corpus_dir)
+    corpus = load_corpus(corpus_dir)
+    if not corpus:
+        print("No PDFs found.")
+        return 1
+
+    rows = []
+    for engine in args.engines:
+        if engine != "auto" and not ENGINES[engine].available():
+            print(f"Skipping {engine}: not installed", file=sys.stderr)
+            continue
+        rows.append(run_engine(engine, corpus, args.repeats))
+        print(f"{engine}: done", file=sys.stderr)
+
+    print(f"{'engine':<12} {'docs':>5} {'ms/page':>9} {'similarity':>11} {'failed':>7}  chosen")
+    for row in rows:
+        ms_per_page = row["seconds"] * 1000 / row["pages"] if row["pages"] else float("nan")
+        fidelity = (f"{sum(row['similarities']) / len(row['similarities']):.3f}"
+                    if row["similarities"] else "n/a")
+        chosen = ", ".join(f"{engine} x{count}" for engine, count in sorted(row["chosen"].items()))
+        print(f"{row['engine']:<12} {len(corpus):>5} {ms_per_page:>9.1f} {fidelity:>11} {row['failures']:>7}  {chosen}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
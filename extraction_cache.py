@@ -0,0 +1,164 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+from metrics import increment
+
+# Content-addressed cache for extracted resume text.
+# Entries are keyed by a hash of the uploaded PDF bytes plus the extractor
+# version, so the same resume is parsed once no matter how many times
+# Streamlit reruns the script. Two tiers: an in-process LRU and a
+# size-bounded directory on disk that survives restarts.
+
+
+class ExtractionCache:
+    def __init__(self, cache_dir, max_memory_entries=128, max_disk_bytes=200 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._extracting = {}
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    # Build the cache key from the raw PDF bytes and the extractor version
+    @staticmethod
+    def make_key(pdf_bytes, version):
+        digest = hashlib.sha256()
+        digest.update(str(version).encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(pdf_bytes)
+        return digest.hexdigest()
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.txt")
+
+    def _remember(self, key, text):
+        # Caller must hold the lock
+        self._memory[key] = text
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                increment("cache_events_total", cache="extraction", event="memory_hit")
+                return self._memory[key]
+
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+            # Touch the file so disk eviction is least-recently-used
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.stats["misses"] += 1
+            increment("cache_events_total", cache="extraction", event="miss")
+            return None
+
+        with self._lock:
+            self.stats["disk_hits"] += 1
+            increment("cache_events_total", cache="extraction", event="disk_hit")
+            self._remember(key, text)
+        return text
+
+    def put(self, key, text):
+        with self._lock:
+            self._remember(key, text)
+
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Extraction cache write failed: {e}")
+            return
+        self._evict_disk()
+
+    # Drop the least recently used files until the directory fits the budget
+    def _evict_disk(self):
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".txt"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            with self._lock:
+                self.stats["evictions"] += 1
+
+    # keep(text) decides whether a fresh result is cached; by default every result is
+    def get_or_extract(self, pdf_bytes, version, extract, keep=None):
+        key = self.make_key(pdf_bytes, version)
+        text = self.get(key)
+        if text is not None:
+            return text
+
+        # Only one thread extracts a given document; the others wait for its result.
+        # Each entry is [lock, threads using it] and is removed by the last of them, so
+        # a thread arriving later never gets a second lock for a key still in use.
+        with self._lock:
+            entry = self._extracting.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                with self._lock:
+                    text = self._memory.get(key)
+                if text is None:
+                    text = extract()
+                    if keep is None or keep(text):
+                        self.put(key, text)
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1] and self._extracting.get(key) is entry:
+                    del self._extracting[key]
+        return text
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((lookups - stats["misses"]) / lookups, 3) if lookups else 0.0
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+# Process-wide cache shared by every Streamlit session
+def get_extraction_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ExtractionCache(
+                os.getenv("EXTRACTION_CACHE_DIR", os.path.join(".cache", "extraction")),
+                max_memory_entries=int(os.getenv("EXTRACTION_CACHE_MEMORY_ENTRIES", "128")),
+                max_disk_bytes=int(os.getenv("EXTRACTION_CACHE_DISK_MB", "200")) * 1024 * 1024,
+            )
+        return _cache
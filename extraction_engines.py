@@ -0,0 +1,172 @@
+import io
+import os
+import re
+import shutil
+import subprocess
+import importlib.util
+
+from ocr import rasterizable_path
+from metrics import span, increment
+
+# Text-layer extraction engines.
+#
+# Every engine turns PDF bytes into one string per page plus, where it knows
+# them, page sizes in points (used to pick the OCR resolution for sparse
+# pages). Engines, fastest first:
+#   pdfium      pypdfium2, if installed (C++ text dump, no layout analysis)
+#   pdftotext   poppler's pdftotext, installed alongside pdf2image's pdftoppm
+#   pdfplumber  pure Python with layout analysis; slow but copes with odd fonts
+# In "auto" mode (EXTRACTION_ENGINE, default) the first available fast engine
+# runs and pdfplumber is used only when that fails or its text looks garbled
+# (lost word spacing, unmapped glyphs). Pages without a usable text layer
+# still go to OCR in resume_core.extract_text_from_pdf.
+
+# Glyphs without a unicode mapping, as pdfminer and poppler print them
+UNMAPPED_GLYPH_RE = re.compile(r"\(cid:\d+\)|\ufffd")
+
+
+class ExtractionEngine:
+    name = None
+
+    def available(self):
+        return True
+
+    # Function to read the text layer of the first max_pages pages (all when None);
+    # returns (page_texts, page_sizes)
+    def extract(self, pdf_bytes, max_pages=None):
+        raise NotImplementedError
+
+
+class PdfiumEngine(ExtractionEngine):
+    name = "pdfium"
+
+    def available(self):
+        return importlib.util.find_spec("pypdfium2") is not None
+
+    def extract(self, pdf_bytes, max_pages=None):
+        import pypdfium2 as pdfium
+
+        page_texts = []
+        page_sizes = {}
+        pdf = pdfium.PdfDocument(pdf_bytes)
+        try:
+            page_count = len(pdf) if max_pages is None else min(len(pdf), max_pages)
+            for number in range(1, page_count + 1):
+                page = pdf[number - 1]
+                try:
+                    page_sizes[number] = tuple(float(value) for value in page.get_size())
+                    text_page = page.get_textpage()
+                    try:
+                        page_texts.append(text_page.get_text_range().replace("\r\n", "\n"))
+                    finally:
+                        text_page.close()
+                finally:
+                    page.close()
+        finally:
+            pdf.close()
+        return page_texts, page_sizes
+
+
+class PdftotextEngine(ExtractionEngine):
+    name = "pdftotext"
+
+    def available(self):
+        return shutil.which("pdftotext") is not None
+
+    def extract(self, pdf_bytes, max_pages=None):
+        page_range = [] if max_pages is None else ["-f", "1", "-l", str(max_pages)]
+        with rasterizable_path(pdf_bytes) as pdf_path:
+            output = subprocess.run(
+                ["pdftotext", "-enc", "UTF-8", "-q", *page_range, pdf_path, "-"],
+                capture_output=True, timeout=float(os.getenv("PDFTOTEXT_TIMEOUT_SECONDS", "60")), check=True,
+            )
+        # pdftotext ends every page with a form feed
+        page_texts = output.stdout.decode("utf-8", errors="replace").split("\f")
+        if page_texts and not page_texts[-1].strip():
+            page_texts.pop()
+        return page_texts, {}
+
+
+class PdfplumberEngine(ExtractionEngine):
+    name = "pdfplumber"
+
+    def available(self):
+        return importlib.util.find_spec("pdfplumber") is not None
+
+    def extract(self, pdf_bytes, max_pages=None):
+        # Imported here so starting the app does not load pdfminer
+        import pdfplumber
+
+        page_texts = []
+        page_sizes = {}
+        pages = None if max_pages is None else list(range(1, max_pages + 1))
+        with pdfplumber.open(io.BytesIO(pdf_bytes), pages=pages) as pdf:
+            for number, page in enumerate(pdf.pages, start=1):
+                page_sizes[number] = (float(page.width), float(page.height))
+                page_texts.append(page.extract_text() or "")
+        return page_texts, page_sizes
+
+
+ENGINES = {engine.name: engine for engine in (PdfiumEngine(), PdftotextEngine(), PdfplumberEngine())}
+FAST_ENGINES = ("pdfium", "pdftotext")
+
+
+def available_engines():
+    return [name for name, engine in ENGINES.items() if engine.available()]
+
+
+# Function to spot text a fast engine mangled: unmapped glyphs, words run together
+# because spaces were lost, or words broken into single letters
+def looks_garbled(page_texts):
+    text = "".join(page_texts)
+    words = text.split()
+    if len(words) < 20:
+        # Too little text to judge; sparse pages are OCR'd anyway
+        return False
+    if len(UNMAPPED_GLYPH_RE.findall(text)) > len(words) * 0.02:
+        return True
+    average_length = sum(len(word) for word in words) / len(words)
+    single_letters = sum(1 for word in words if len(word) == 1 and word.isalpha())
+    return average_length > 14 or single_letters > len(words) * 0.4
+
+
+def _run_engine(name, pdf_bytes, max_pages=None):
+    with span("pdf_text", engine=name) as fields:
+        page_texts, page_sizes = ENGINES[name].extract(pdf_bytes, max_pages)
+        fields["pages"] = len(page_texts)
+    return page_texts, page_sizes
+
+
+# Function to read a PDF's text layer with the given engine, or pick one per document.
+# Only the first max_pages pages are read when it is set.
+# Returns (page_texts, page_sizes, engine_name); page_texts is empty when no engine
+# could read the document.
+def extract_text_layer(pdf_bytes, engine=None, max_pages=None):
+    engine = engine or os.getenv("EXTRACTION_ENGINE", "auto")
+    if engine != "auto" and engine not in ENGINES:
+        raise ValueError(f"Unknown extraction engine {engine!r}; expected auto or one of {', '.join(ENGINES)}")
+    if engine != "auto":
+        candidates = [engine]
+    else:
+        candidates = [name for name in FAST_ENGINES if ENGINES[name].available()] + ["pdfplumber"]
+
+    garbled = None
+    for index, name in enumerate(candidates):
+        try:
+            page_texts, page_sizes = _run_engine(name, pdf_bytes, max_pages)
+        except MemoryError:
+            # Out of the worker's memory budget (see extraction_guard); another engine will not help
+            raise
+        except Exception as e:
+            print(f"Text extraction with {name} failed: {e}")
+            increment("extraction_engine_total", engine=name, outcome="failed")
+            continue
+        if index < len(candidates) - 1 and name in FAST_ENGINES and looks_garbled(page_texts):
+            # Layout-sensitive or unusual fonts: let pdfplumber have a go
+            increment("extraction_engine_total", engine=name, outcome="garbled")
+            garbled = garbled or (page_texts, page_sizes, name)
+            continue
+        increment("extraction_engine_total", engine=name, outcome="chosen")
+        return page_texts, page_sizes, name
+    # Garbled text beats no text when the slower engines could not read the file either
+    return garbled or ([], {}, None)
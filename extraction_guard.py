@@ -0,0 +1,312 @@
+import os
+import re
+import time
+import shutil
+import signal
+import threading
+import subprocess
+import multiprocessing
+
+from ocr import rasterizable_path
+from metrics import get_metrics, span, increment
+
+# Resource limits for reading uploaded PDFs.
+#
+# A huge, image-heavy or malformed PDF can keep pdfplumber, poppler and
+# Tesseract busy for minutes and use gigabytes of memory. Every document
+# therefore goes through three steps:
+#   1. pre-flight: the byte size and %PDF header are checked, and pdfinfo (a
+#      separate poppler process) reports the page count and page sizes
+#   2. only the first EXTRACTION_MAX_PAGES pages are read, and pages larger
+#      than PDF_MAX_PAGE_INCHES on either edge are never rasterized for OCR
+#   3. extraction runs in a worker process with its own process group, a
+#      memory budget (EXTRACTION_MEMORY_MB) and a wall-clock budget
+#      (EXTRACTION_TIMEOUT_SECONDS); when either runs out the whole group,
+#      including OCR workers and poppler/tesseract, is killed
+# The memory budget is per document: while the worker runs, the parent sums
+# the resident memory of every process in its group a few times a second.
+# Each process also gets an address-space limit (RLIMIT_AS) of the same size,
+# which stops a single runaway allocation between two checks and is all that
+# applies where /proc is missing.
+# When a budget runs out the text found so far (the text layer, plus any pages
+# already OCR'd) is returned with a note, so one bad upload costs a bounded
+# amount of work and never takes the app's memory with it.
+
+
+class PdfRejected(ValueError):
+    pass
+
+
+# Function to read the limits from the environment; 0 turns a limit off
+def get_limits(**overrides):
+    limits = {
+        "max_bytes": int(float(os.getenv("PDF_MAX_MB", "20")) * 1024 * 1024),
+        "max_pages": int(os.getenv("EXTRACTION_MAX_PAGES", "20")),
+        "max_page_points": float(os.getenv("PDF_MAX_PAGE_INCHES", "50")) * 72,
+        "timeout": float(os.getenv("EXTRACTION_TIMEOUT_SECONDS", "90")),
+        "memory_mb": int(os.getenv("EXTRACTION_MEMORY_MB", "1536")),
+        "isolated": os.getenv("EXTRACTION_ISOLATION", "1") == "1",
+        # OCR processes per isolated extraction
+        "ocr_workers": int(os.getenv("EXTRACTION_OCR_WORKERS", "0")) or min(
+            4, int(os.getenv("OCR_WORKERS", "0")) or os.cpu_count() or 1
+        ),
+        "start_method": os.getenv("EXTRACTION_START_METHOD") or (
+            "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        ),
+    }
+    limits.update(overrides)
+    return limits
+
+
+_slots = None
+_slots_lock = threading.Lock()
+_forkserver_preloaded = False
+
+# Seconds between two memory checks of a running worker
+MEMORY_CHECK_SECONDS = 0.2
+# Modules the forkserver imports once so workers do not; resume_core imports the
+# PDF and OCR libraries lazily, so they are listed too (missing ones are skipped)
+FORKSERVER_PRELOAD = ["resume_core", "pypdfium2", "pdfplumber", "pdf2image", "pytesseract", "PIL.Image"]
+
+
+# Process-wide cap on concurrent isolated extractions, so a burst of uploads
+# cannot start more workers than the machine has cores
+def get_extraction_slots():
+    global _slots
+    with _slots_lock:
+        if _slots is None:
+            size = int(os.getenv("EXTRACTION_MAX_CONCURRENT", "0")) or os.cpu_count() or 1
+            _slots = threading.BoundedSemaphore(size)
+        return _slots
+
+
+# Function to inspect a PDF without parsing it in this process.
+# Returns {"bytes", "pages", "page_sizes"}; pages is None when pdfinfo is missing
+# or cannot read the file. Page sizes are only listed for the first max_pages pages.
+def inspect_pdf(pdf_bytes, max_pages=None, timeout=30):
+    info = {"bytes": len(pdf_bytes), "pages": None, "page_sizes": {}}
+    pdfinfo = shutil.which("pdfinfo")
+    if pdfinfo is None:
+        return info
+    page_range = ["-f", "1", "-l", str(max_pages)] if max_pages else []
+    try:
+        with rasterizable_path(pdf_bytes) as pdf_path:
+            output = subprocess.run([pdfinfo, *page_range, pdf_path], capture_output=True, timeout=timeout, check=True)
+    except (OSError, subprocess.SubprocessError) as e:
+        print(f"PDF inspection failed: {e}")
+        return info
+    for line in output.stdout.decode("utf-8", errors="replace").splitlines():
+        # "Pages:          3" and, per page, "Page    1 size: 612 x 792 pts (letter)"
+        match = re.match(r"Pages:\s+(\d+)", line)
+        if match:
+            info["pages"] = int(match.group(1))
+        match = re.match(r"Page\s+(\d+)\s+size:\s+([\d.]+)\s+x\s+([\d.]+)", line)
+        if match:
+            info["page_sizes"][int(match.group(1))] = (float(match.group(2)), float(match.group(3)))
+    return info
+
+
+# Function to sum the resident memory of a process group in MB; None without /proc
+def _group_memory_mb(pgid):
+    if not os.path.isdir("/proc"):
+        return None
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    total = 0
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat", "rb") as f:
+                # Fields after the command name: state, ppid, pgrp, ..., rss (22nd)
+                fields = f.read().rsplit(b")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        if int(fields[2]) == pgid:
+            total += int(fields[21]) * page_size
+    return total / 1024 / 1024
+
+
+def _limit_memory(memory_mb):
+    try:
+        import resource
+    except ImportError:
+        # Not available on Windows; the time budget still applies
+        return
+    limit = memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+# Function run in the worker process. Messages to the parent: ("progress", text)
+# as text is found, ("metrics", state), then ("done", text), ("memory", None) or
+# ("error", message).
+def _extract_in_worker(conn, pdf_bytes, max_pages, skip_ocr_pages, memory_mb, ocr_workers):
+    # Own process group, so the parent can kill OCR workers and poppler/tesseract with it
+    if hasattr(os, "setpgrp"):
+        os.setpgrp()
+    # Only the parent writes the metrics file; what the worker records is sent back
+    os.environ.pop("METRICS_FILE", None)
+    os.environ["OCR_WORKERS"] = str(ocr_workers)
+    if memory_mb:
+        _limit_memory(memory_mb)
+
+    from resume_core import extract_text_from_pdf
+
+    try:
+        text = extract_text_from_pdf(
+            pdf_bytes, max_pages=max_pages, skip_ocr_pages=skip_ocr_pages,
+            on_progress=lambda text: conn.send(("progress", text)),
+        )
+        result = ("done", text)
+    except MemoryError:
+        result = ("memory", None)
+    except Exception as e:
+        result = ("error", f"{type(e).__name__}: {e}")
+    try:
+        conn.send(("metrics", get_metrics().export()))
+        conn.send(result)
+    finally:
+        conn.close()
+
+
+def _kill_worker(process):
+    if process.pid is None:
+        return
+    if hasattr(os, "killpg"):
+        try:
+            # Also stops anything still running in the group after the worker exited
+            os.killpg(process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+    # The group does not exist yet when the worker is killed before it calls setpgrp
+    if process.is_alive():
+        process.kill()
+    process.join(5)
+
+
+# Function to extract in a worker process within the time and memory budget.
+# Returns (outcome, text); outcome is "ok", "timeout", "memory", "crashed" or "failed",
+# and text is whatever the worker had found when it stopped.
+def _extract_isolated(pdf_bytes, max_pages, skip_ocr_pages, limits):
+    global _forkserver_preloaded
+    context = multiprocessing.get_context(limits["start_method"])
+    if limits["start_method"] == "forkserver" and not _forkserver_preloaded:
+        # Workers fork from a server that has already imported the extraction code
+        context.set_forkserver_preload(FORKSERVER_PRELOAD)
+        _forkserver_preloaded = True
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(
+        target=_extract_in_worker,
+        args=(sender, pdf_bytes, max_pages, sorted(skip_ocr_pages), limits["memory_mb"], limits["ocr_workers"]),
+        name="pdf-extraction",
+    )
+    state = {"text": "", "outcome": None}
+
+    def handle(kind, value):
+        if kind == "progress":
+            state["text"] = value
+        elif kind == "metrics":
+            get_metrics().merge(value)
+        elif kind == "done":
+            state["text"], state["outcome"] = value, "ok"
+        elif kind == "memory":
+            state["outcome"] = "memory"
+        else:
+            print(f"Isolated extraction failed: {value}")
+            state["outcome"] = "failed"
+
+    deadline = time.monotonic() + limits["timeout"] if limits["timeout"] else None
+    process.start()
+    sender.close()
+    next_memory_check = 0.0
+    try:
+        while state["outcome"] is None:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                state["outcome"] = "timeout"
+                break
+            if receiver.poll(MEMORY_CHECK_SECONDS if remaining is None else min(remaining, MEMORY_CHECK_SECONDS)):
+                try:
+                    handle(*receiver.recv())
+                except EOFError:
+                    # The worker died without reporting, e.g. killed by the kernel for its memory use
+                    process.join(1)
+                    state["outcome"] = "memory" if process.exitcode == -signal.SIGKILL else "crashed"
+            # Sum the memory of the whole group, so OCR processes count towards the budget
+            if state["outcome"] is None and limits["memory_mb"] and time.monotonic() >= next_memory_check:
+                next_memory_check = time.monotonic() + MEMORY_CHECK_SECONDS
+                memory_mb = _group_memory_mb(process.pid)
+                if memory_mb is not None and memory_mb > limits["memory_mb"]:
+                    state["outcome"] = "memory"
+        if state["outcome"] in ("timeout", "memory"):
+            _kill_worker(process)
+            # Keep the last progress the worker managed to send
+            while receiver.poll(0):
+                try:
+                    kind, value = receiver.recv()
+                except EOFError:
+                    break
+                if kind in ("progress", "metrics"):
+                    handle(kind, value)
+    finally:
+        _kill_worker(process)
+        receiver.close()
+    return state["outcome"], state["text"]
+
+
+# Function to extract a PDF's text within the configured limits.
+# Returns {"text", "complete", "outcome", "pages", "pages_read", "notes"}; notes are
+# messages for the user about anything that was skipped. Raises PdfRejected for
+# files that are not read at all.
+def extract_text_guarded(pdf_bytes, limits=None):
+    from resume_core import extract_text_from_pdf
+
+    limits = limits or get_limits()
+    pdf_bytes = bytes(pdf_bytes)
+    if limits["max_bytes"] and len(pdf_bytes) > limits["max_bytes"]:
+        increment("extraction_guard_total", outcome="rejected")
+        raise PdfRejected(
+            f"The PDF is {len(pdf_bytes) / 1024 / 1024:.1f} MB; files up to "
+            f"{limits['max_bytes'] / 1024 / 1024:.0f} MB can be read."
+        )
+    # The header may follow up to 1 KB of junk
+    if b"%PDF-" not in pdf_bytes[:1024]:
+        increment("extraction_guard_total", outcome="rejected")
+        raise PdfRejected("The file is not a PDF.")
+
+    max_pages = limits["max_pages"] or None
+    with span("preflight", bytes=len(pdf_bytes)) as fields:
+        info = inspect_pdf(pdf_bytes, max_pages)
+        fields["pages"] = info["pages"]
+    notes = []
+    pages_read = info["pages"] if max_pages is None or info["pages"] is None else min(info["pages"], max_pages)
+    if pages_read is not None and pages_read < info["pages"]:
+        notes.append(f"Only the first {pages_read} of {info['pages']} pages were read.")
+    oversized = sorted(
+        number for number, size in info["page_sizes"].items()
+        if limits["max_page_points"] and max(size) > limits["max_page_points"]
+    )
+    if oversized:
+        notes.append(f"Pages {', '.join(map(str, oversized))} are too large to scan and were only read for text.")
+
+    with span("extract_guarded", isolated=limits["isolated"]) as fields:
+        if limits["isolated"]:
+            with get_extraction_slots():
+                outcome, text = _extract_isolated(pdf_bytes, max_pages, oversized, limits)
+        else:
+            outcome, text = "ok", extract_text_from_pdf(pdf_bytes, max_pages=max_pages, skip_ocr_pages=oversized)
+        fields["outcome"] = outcome
+
+    if outcome == "timeout":
+        notes.append(f"Reading the PDF took longer than {limits['timeout']:.0f} seconds; "
+                     "the text found until then is used.")
+    elif outcome == "memory":
+        notes.append(f"Reading the PDF needed more than {limits['memory_mb']} MB of memory; "
+                     "the text found until then is used.")
+    elif outcome in ("crashed", "failed"):
+        notes.append("The PDF could not be read completely; the text found until then is used.")
+    complete = outcome == "ok" and not notes
+    increment("extraction_guard_total", outcome=outcome if outcome != "ok" or complete else "partial")
+    return {
+        "text": text, "complete": complete, "outcome": outcome,
+        "pages": info["pages"], "pages_read": pages_read, "notes": notes,
+    }
@@ -0,0 +1,97 @@
+import os
+import time
+import random
+import hashlib
+
+# Offline stand-in for a Gemini GenerativeModel.
+#
+# Set GEMINI_BACKEND=fake to make gemini_client.get_model return one of these,
+# so the app, the batch tools and benchmark.py run without an API key or
+# network. Responses are deterministic for a given prompt and arrive after a
+# configurable delay, optionally streamed in chunks:
+#   FAKE_GEMINI_LATENCY       seconds before the first token (default 0.5)
+#   FAKE_GEMINI_CHUNK_DELAY   seconds between streamed chunks (default 0.05)
+#   FAKE_GEMINI_CHUNKS        number of streamed chunks (default 8)
+#   FAKE_GEMINI_OUTPUT_WORDS  words in a response (default 400)
+
+WORDS = (
+    "resume experience impact results clarity quantify achievements leadership skills projects "
+    "formatting consistency recruiters keywords alignment role responsibilities education summary "
+    "improve highlight tailor concise metrics growth ownership delivery collaboration"
+).split()
+
+
+class _Usage:
+    def __init__(self, prompt_tokens, output_tokens):
+        self.prompt_token_count = prompt_tokens
+        self.candidates_token_count = output_tokens
+        self.total_token_count = prompt_tokens + output_tokens
+
+
+class _Part:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeResponse:
+    def __init__(self, text, usage=None):
+        self.text = text
+        self.parts = [_Part(text)] if text else []
+        self.usage_metadata = usage
+
+
+class _TokenCount:
+    def __init__(self, total_tokens):
+        self.total_tokens = total_tokens
+
+
+def fake_settings_from_env():
+    return {
+        "latency": float(os.getenv("FAKE_GEMINI_LATENCY", "0.5")),
+        "chunk_delay": float(os.getenv("FAKE_GEMINI_CHUNK_DELAY", "0.05")),
+        "chunks": max(1, int(os.getenv("FAKE_GEMINI_CHUNKS", "8"))),
+        "output_words": int(os.getenv("FAKE_GEMINI_OUTPUT_WORDS", "400")),
+    }
+
+
+class FakeModel:
+    def __init__(self, model_name, latency=0.5, chunk_delay=0.05, chunks=8, output_words=400, sleep=time.sleep):
+        self.model_name = f"models/{model_name}"
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+        self.chunks = chunks
+        self.output_words = output_words
+        self._sleep = sleep
+
+    @staticmethod
+    def _tokens(text):
+        return len(text) // 4 + 1
+
+    def count_tokens(self, contents):
+        return _TokenCount(self._tokens(str(contents)))
+
+    def _response_text(self, prompt):
+        # Seeded by the prompt so the same input always gets the same critique
+        seed = int.from_bytes(hashlib.sha256(prompt.encode("utf-8")).digest()[:8], "big")
+        rng = random.Random(seed)
+        words = [rng.choice(WORDS) for _ in range(self.output_words)]
+        lines = [" ".join(words[i:i + 12]) for i in range(0, len(words), 12)]
+        return "1. OVERALL IMPRESSION:\n" + "\n".join(f"- {line}" for line in lines)
+
+    def generate_content(self, contents, stream=False, **kwargs):
+        prompt = str(contents)
+        text = self._response_text(prompt)
+        usage = _Usage(self._tokens(prompt), self._tokens(text))
+        if not stream:
+            self._sleep(self.latency + self.chunk_delay * (self.chunks - 1))
+            return FakeResponse(text, usage)
+        return self._stream(text, usage)
+
+    def _stream(self, text, usage):
+        size = -(-len(text) // self.chunks)
+        pieces = [text[i:i + size] for i in range(0, len(text), size)]
+        self._sleep(self.latency)
+        for index, piece in enumerate(pieces):
+            if index:
+                self._sleep(self.chunk_delay)
+            yield FakeResponse(piece, usage if index == len(pieces) - 1 else None)
@@ -0,0 +1,87 @@
+import os
+import threading
+
+# Process-wide Gemini model registry.
+# Streamlit re-executes the app script on every interaction, so configuring
+# the SDK and building GenerativeModel objects there repeats the setup work
+# for each request. The registry configures the SDK once per process and
+# keeps one model object per model name; the SDK's underlying client (and
+# its connections) is shared by all of them. The SDK itself is imported on
+# first use so pages that never call Gemini do not pay for it.
+
+HARM_CATEGORIES = [
+    "HARM_CATEGORY_HARASSMENT",
+    "HARM_CATEGORY_HATE_SPEECH",
+    "HARM_CATEGORY_SEXUALLY_EXPLICIT",
+    "HARM_CATEGORY_DANGEROUS_CONTENT",
+]
+
+_models = {}
+_configured = False
+_lock = threading.Lock()
+
+
+def default_model_name():
+    return os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+
+
+# Models users may pick per request, e.g. GEMINI_MODELS=gemini-1.5-flash,gemini-1.5-pro
+def available_model_names():
+    names = [name.strip() for name in os.getenv("GEMINI_MODELS", "").split(",") if name.strip()]
+    default = default_model_name()
+    return [default] + [name for name in names if name != default]
+
+
+# Function to read the generation config from the environment
+def generation_config_from_env():
+    config = {}
+    if os.getenv("GEMINI_TEMPERATURE"):
+        config["temperature"] = float(os.getenv("GEMINI_TEMPERATURE"))
+    if os.getenv("GEMINI_TOP_P"):
+        config["top_p"] = float(os.getenv("GEMINI_TOP_P"))
+    if os.getenv("GEMINI_MAX_OUTPUT_TOKENS"):
+        config["max_output_tokens"] = int(os.getenv("GEMINI_MAX_OUTPUT_TOKENS"))
+    return config or None
+
+
+# Function to read safety settings, e.g. GEMINI_SAFETY_THRESHOLD=BLOCK_ONLY_HIGH
+def safety_settings_from_env():
+    threshold = os.getenv("GEMINI_SAFETY_THRESHOLD")
+    if not threshold:
+        return None
+    return {category: threshold for category in HARM_CATEGORIES}
+
+
+def _configure():
+    global _configured
+    if not _configured:
+        import google.generativeai as genai
+
+        options = {"api_key": os.getenv("GOOGLE_API_KEY")}
+        if os.getenv("GEMINI_TRANSPORT"):
+            options["transport"] = os.getenv("GEMINI_TRANSPORT")
+        genai.configure(**options)
+        _configured = True
+
+
+# Function to get the shared model for a name (defaults to GEMINI_MODEL)
+def get_model(model_name=None):
+    model_name = model_name or default_model_name()
+    with _lock:
+        model = _models.get(model_name)
+        if model is None and os.getenv("GEMINI_BACKEND") == "fake":
+            # Offline stand-in for development and benchmarks
+            from fake_gemini import FakeModel, fake_settings_from_env
+
+            model = _models[model_name] = FakeModel(model_name, **fake_settings_from_env())
+        if model is None:
+            import google.generativeai as genai
+
+            _configure()
+            model = genai.GenerativeModel(
+                model_name,
+                generation_config=generation_config_from_env(),
+                safety_settings=safety_settings_from_env(),
+            )
+            _models[model_name] = model
+        return model
@@ -0,0 +1,225 @@
+import os
+import sys
+import time
+import sqlite3
+import hashlib
+import argparse
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+from ats_engine import tokenize
+
+# Library of job postings with top-k matching for a resume.
+#
+# Postings are stored pre-tokenized in SQLite as an inverted index
+# (term -> postings that contain it), using the same tokenization as
+# calculate_ats_score. Adding, changing or removing a posting only rewrites
+# that posting's rows. Queries load the inverted index into NumPy arrays once
+# per index generation and score every posting in one pass, so a resume's
+# score for a posting equals calculate_ats_score(resume, posting).
+#
+#   python jd_index.py sync postings/          # one .txt per posting, first line is the title
+#   python jd_index.py add job-42 job42.txt
+#   python jd_index.py remove job-42
+#   python jd_index.py query resume.pdf -k 10
+
+
+def default_index_path():
+    return os.getenv("JD_INDEX_PATH", "jd_index.sqlite3")
+
+
+class JDIndex:
+    def __init__(self, path=None):
+        self.path = path or default_index_path()
+        self._lock = threading.Lock()
+        self._loaded_generation = None
+        self._postings = {}
+        self._job_ids = []
+        self._titles = []
+        self._term_counts = np.zeros(0)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " job_id TEXT PRIMARY KEY, title TEXT NOT NULL, term_count INTEGER NOT NULL,"
+                " fingerprint TEXT NOT NULL, updated_at REAL NOT NULL);"
+                "CREATE TABLE IF NOT EXISTS postings ("
+                " term TEXT NOT NULL, job_id TEXT NOT NULL, PRIMARY KEY (term, job_id)) WITHOUT ROWID;"
+                "CREATE INDEX IF NOT EXISTS postings_job ON postings (job_id);"
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);"
+                "INSERT OR IGNORE INTO meta (key, value) VALUES ('generation', 0);"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _bump_generation(conn):
+        conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'generation'")
+
+    def _upsert(self, conn, job_id, title, text):
+        fingerprint = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        row = conn.execute("SELECT fingerprint, title FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is not None and row[0] == fingerprint and row[1] == title:
+            return False
+        terms = tokenize(text)
+        conn.execute("DELETE FROM postings WHERE job_id = ?", (job_id,))
+        conn.executemany("INSERT INTO postings (term, job_id) VALUES (?, ?)",
+                         ((term, job_id) for term in terms))
+        conn.execute(
+            "INSERT OR REPLACE INTO jobs (job_id, title, term_count, fingerprint, updated_at)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (job_id, title, len(terms), fingerprint, time.time()),
+        )
+        self._bump_generation(conn)
+        return True
+
+    # Function to add or update a posting; unchanged postings are skipped
+    def upsert(self, job_id, title, text):
+        with self._connect() as conn:
+            return self._upsert(conn, job_id, title, text)
+
+    def remove(self, job_id):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM postings WHERE job_id = ?", (job_id,))
+            removed = conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,)).rowcount
+            if removed:
+                self._bump_generation(conn)
+        return bool(removed)
+
+    # Function to mirror a directory of .txt postings; returns (added_or_updated, removed)
+    def sync_directory(self, directory):
+        seen = set()
+        changed = 0
+        # One transaction for the whole directory
+        with self._connect() as conn:
+            for name in sorted(os.listdir(directory)):
+                if not name.endswith(".txt"):
+                    continue
+                job_id = os.path.splitext(name)[0]
+                with open(os.path.join(directory, name), "r", encoding="utf-8", errors="ignore") as f:
+                    text = f.read()
+                title = next((line.strip() for line in text.splitlines() if line.strip()), job_id)
+                seen.add(job_id)
+                changed += self._upsert(conn, job_id, title, text)
+
+        removed = 0
+        for job_id in set(self.job_ids()) - seen:
+            removed += self.remove(job_id)
+        return changed, removed
+
+    def job_ids(self):
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute("SELECT job_id FROM jobs")]
+
+    def __len__(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    # Reload the in-memory inverted index when the stored generation changed
+    def _refresh(self):
+        with self._connect() as conn:
+            generation = conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()[0]
+            if generation == self._loaded_generation:
+                return
+            jobs = conn.execute("SELECT job_id, title, term_count FROM jobs ORDER BY job_id").fetchall()
+            rows = {job_id: index for index, (job_id, _, _) in enumerate(jobs)}
+            postings = {}
+            for term, job_id in conn.execute("SELECT term, job_id FROM postings ORDER BY term"):
+                postings.setdefault(term, []).append(rows[job_id])
+
+        self._postings = {term: np.array(indexes, dtype=np.int64) for term, indexes in postings.items()}
+        self._job_ids = [job[0] for job in jobs]
+        self._titles = [job[1] for job in jobs]
+        self._term_counts = np.array([job[2] for job in jobs], dtype=np.float64)
+        self._loaded_generation = generation
+
+    # Function to rank postings for a resume; scores match calculate_ats_score
+    def top_k(self, resume_text, k=10):
+        with self._lock:
+            self._refresh()
+            if not resume_text or not self._job_ids:
+                return []
+            hits = [self._postings[term] for term in tokenize(resume_text) if term in self._postings]
+            if not hits:
+                return []
+            matched = np.bincount(np.concatenate(hits), minlength=len(self._job_ids))
+            scores = np.divide(matched, self._term_counts, out=np.zeros(len(self._job_ids)),
+                               where=self._term_counts > 0) * 100
+            k = min(k, len(scores))
+            best = np.argpartition(-scores, k - 1)[:k]
+            best = best[np.argsort(-scores[best], kind="stable")]
+            return [
+                {"job_id": self._job_ids[i], "title": self._titles[i], "score": round(float(scores[i]), 2)}
+                for i in best
+            ]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+# Process-wide index per path so the loaded arrays are shared between sessions
+def get_jd_index(path=None):
+    path = path or default_index_path()
+    with _indexes_lock:
+        if path not in _indexes:
+            _indexes[path] = JDIndex(path)
+        return _indexes[path]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain and query the job posting index.")
+    parser.add_argument("--index", default=None, help="index file (default: JD_INDEX_PATH or jd_index.sqlite3)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    sync = commands.add_parser("sync", help="mirror a directory of .txt postings")
+    sync.add_argument("directory")
+    add = commands.add_parser("add", help="add or update one posting")
+    add.add_argument("job_id")
+    add.add_argument("file")
+    add.add_argument("--title")
+    remove = commands.add_parser("remove", help="remove one posting")
+    remove.add_argument("job_id")
+    query = commands.add_parser("query", help="rank postings for a resume PDF or text file")
+    query.add_argument("resume")
+    query.add_argument("-k", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    index = JDIndex(args.index)
+    if args.command == "sync":
+        changed, removed = index.sync_directory(args.directory)
+        print(f"{changed} postings added or updated, {removed} removed, {len(index)} in the index.")
+    elif args.command == "add":
+        with open(args.file, "r", encoding="utf-8", errors="ignore") as f:
+            text = f.read()
+        index.upsert(args.job_id, args.title or args.job_id, text)
+    elif args.command == "remove":
+        if not index.remove(args.job_id):
+            print(f"No posting with id {args.job_id}.")
+            return 1
+    else:
+        if args.resume.lower().endswith(".pdf"):
+            from resume_core import extract_text_from_pdf
+            resume_text = extract_text_from_pdf(args.resume)
+        else:
+            with open(args.resume, "r", encoding="utf-8", errors="ignore") as f:
+                resume_text = f.read()
+        start = time.perf_counter()
+        matches = index.top_k(resume_text, args.k)
+        elapsed = (time.perf_counter() - start) * 1000
+        for rank, match in enumerate(matches, start=1):
+            print(f"{rank:>3}. {match['score']:>6.2f}%  {match['job_id']}  {match['title']}")
+        print(f"({elapsed:.1f} ms, including index load on first query)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
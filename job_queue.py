@@ -0,0 +1,177 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import hashlib
+import threading
+from contextlib import contextmanager
+
+# Persistent job queue for the HTTP API, stored in SQLite.
+# Jobs survive restarts: anything left "running" by a crashed worker is put
+# back in the queue on startup. A job that has already been started
+# max_attempts times is marked failed instead of being run again, so a resume
+# that crashes its worker cannot do so forever. Submissions are deduplicated by
+# a hash of the resume bytes, the job description and the options, so
+# identical requests share one job instead of queueing the same work twice.
+
+STATUSES = ("queued", "running", "done", "failed")
+
+
+class JobQueue:
+    def __init__(self, path, max_attempts=3):
+        self.path = path
+        self.max_attempts = max_attempts
+        self._wakeup = threading.Condition()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY, dedupe_key TEXT NOT NULL UNIQUE, status TEXT NOT NULL,"
+                " resume BLOB, job_description TEXT NOT NULL, options TEXT NOT NULL,"
+                " result TEXT, error TEXT, attempts INTEGER NOT NULL DEFAULT 0,"
+                " created_at REAL NOT NULL, started_at REAL, finished_at REAL);"
+                "CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);"
+            )
+            # Work interrupted by a crash or restart goes back to the queue
+            conn.execute("UPDATE jobs SET status = 'queued', started_at = NULL WHERE status = 'running'")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def dedupe_key(resume_bytes, job_description, options):
+        digest = hashlib.sha256()
+        digest.update(resume_bytes)
+        digest.update(b"\0")
+        digest.update((job_description or "").encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(json.dumps(options, sort_keys=True).encode("utf-8"))
+        return digest.hexdigest()
+
+    # Function to enqueue a job; returns (job_id, deduplicated)
+    def submit(self, resume_bytes, job_description, options):
+        key = self.dedupe_key(resume_bytes, job_description, options)
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT id, status FROM jobs WHERE dedupe_key = ?", (key,)).fetchone()
+                if row is not None and row["status"] != "failed":
+                    conn.execute("COMMIT")
+                    return row["id"], True
+                if row is not None:
+                    # Retry a failed job under the same id
+                    job_id = row["id"]
+                    conn.execute(
+                        "UPDATE jobs SET status = 'queued', error = NULL, result = NULL, resume = ?, attempts = 0,"
+                        " created_at = ?, started_at = NULL, finished_at = NULL WHERE id = ?",
+                        (resume_bytes, time.time(), job_id),
+                    )
+                else:
+                    job_id = uuid.uuid4().hex
+                    conn.execute(
+                        "INSERT INTO jobs (id, dedupe_key, status, resume, job_description, options, created_at)"
+                        " VALUES (?, ?, 'queued', ?, ?, ?, ?)",
+                        (job_id, key, resume_bytes, job_description or "", json.dumps(options), time.time()),
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id, False
+
+    # Function to take the oldest queued job; blocks up to timeout seconds
+    def claim(self, timeout=1.0):
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._connect() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                # Jobs whose earlier runs never finished have probably crashed their worker
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = ?, finished_at = ?, resume = NULL"
+                    " WHERE status = 'queued' AND attempts >= ?",
+                    (f"Gave up after {self.max_attempts} interrupted attempts", time.time(), self.max_attempts),
+                )
+                row = conn.execute(
+                    "SELECT id, resume, job_description, options FROM jobs"
+                    " WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE jobs SET status = 'running', started_at = ?, attempts = attempts + 1 WHERE id = ?",
+                        (time.time(), row["id"]),
+                    )
+                conn.execute("COMMIT")
+            if row is not None:
+                return {
+                    "id": row["id"],
+                    "resume": row["resume"],
+                    "job_description": row["job_description"],
+                    "options": json.loads(row["options"]),
+                }
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            with self._wakeup:
+                self._wakeup.wait(min(remaining, 1.0))
+
+    def complete(self, job_id, result):
+        self._finish(job_id, "done", result=json.dumps(result))
+
+    def fail(self, job_id, error):
+        self._finish(job_id, "failed", error=str(error))
+
+    def _finish(self, job_id, status, result=None, error=None):
+        with self._connect() as conn:
+            # The resume bytes are no longer needed once the job is finished
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, resume = NULL WHERE id = ?",
+                (status, result, error, time.time(), job_id),
+            )
+        with self._wakeup:
+            self._wakeup.notify_all()
+
+    def get(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, status, result, error, attempts, created_at, started_at, finished_at"
+                " FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    # Function to wait until a job changes from the given status; returns the job
+    def wait_for_change(self, job_id, status, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job["status"] != status:
+                return job
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return job
+            with self._wakeup:
+                self._wakeup.wait(min(remaining, 0.5))
+
+    # Queue depth per status, for autoscaling
+    def depth(self):
+        with self._connect() as conn:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            oldest = conn.execute("SELECT MIN(created_at) FROM jobs WHERE status = 'queued'").fetchone()[0]
+        depth = {status: counts.get(status, 0) for status in STATUSES}
+        depth["oldest_queued_seconds"] = round(time.time() - oldest, 3) if oldest else 0.0
+        return depth
@@ -0,0 +1,167 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from contextlib import contextmanager
+
+from metrics import increment
+
+# Persistent cache for Gemini responses.
+# Keys hash the whitespace-normalized resume text, the job description, the
+# prompt template version and the model name, so editing the prompt or
+# switching models never serves stale critiques. Entries expire after a TTL
+# and the least recently used ones are dropped once the table is full.
+# Concurrent requests for the same key are collapsed into a single call.
+
+
+def normalize_text(text):
+    return " ".join((text or "").split())
+
+
+class LLMCache:
+    def __init__(self, path, ttl_seconds=7 * 24 * 3600, max_entries=5000):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "coalesced": 0}
+        self._stats_lock = threading.Lock()
+        self._flights = {}
+        self._flights_lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " response TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self.stats[name] += amount
+        increment("cache_events_total", amount, cache="llm", event=name)
+
+    @staticmethod
+    def make_key(resume_text, job_description, prompt_version, model_name, *extra):
+        parts = [normalize_text(resume_text), normalize_text(job_description),
+                 str(prompt_version), str(model_name)] + [str(part) for part in extra]
+        return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+    def _lookup(self, key):
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl_seconds:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    # Function to check for a stored response without counting a hit or miss
+    def contains(self, key):
+        return self._lookup(key) is not None
+
+    def get(self, key):
+        response = self._lookup(key)
+        self._count("hits" if response is not None else "misses")
+        return response
+
+    def put(self, key, response):
+        if not response:
+            return
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, response, now, now),
+            )
+            evicted = conn.execute(
+                "DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,)
+            ).rowcount
+            evicted += conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+        if evicted:
+            self._count("evictions", evicted)
+
+    # Hold a per-key lock so only one caller computes a missing entry
+    @contextmanager
+    def single_flight(self, key):
+        with self._flights_lock:
+            lock, waiters = self._flights.get(key, (threading.Lock(), 0))
+            self._flights[key] = (lock, waiters + 1)
+        try:
+            with lock:
+                yield
+        finally:
+            with self._flights_lock:
+                lock, waiters = self._flights[key]
+                if waiters <= 1:
+                    del self._flights[key]
+                else:
+                    self._flights[key] = (lock, waiters - 1)
+
+    # Return the cached response or compute, store and return it.
+    # compute is called at most once per key at a time across all threads.
+    def get_or_compute(self, key, compute):
+        response = self._lookup(key)
+        if response is not None:
+            self._count("hits")
+            return response
+
+        with self.single_flight(key):
+            # Another caller may have filled the entry while we waited
+            response = self._lookup(key)
+            if response is not None:
+                self._count("coalesced")
+                return response
+            self._count("misses")
+            response = compute()
+            self.put(key, response)
+            return response
+
+    def snapshot(self):
+        with self._stats_lock:
+            stats = dict(self.stats)
+        with self._connect() as conn:
+            stats["entries"] = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+# Process-wide cache shared by every Streamlit session
+def get_llm_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache(
+                os.getenv("LLM_CACHE_PATH", os.path.join(".cache", "llm_cache.sqlite3")),
+                ttl_seconds=int(os.getenv("LLM_CACHE_TTL_HOURS", "168")) * 3600,
+                max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000")),
+            )
+        return _cache
@@ -1,119 +1,28 @@
 import os
+import html
+import difflib
+from concurrent.futures import as_completed
 import streamlit as st
 from dotenv import load_dotenv
-from PIL import Image
-import google.generativeai as genai
-from pdf2image import convert_from_path
-import pytesseract
-import pdfplumber
-import re
+from extraction_cache import get_extraction_cache
+from extraction_guard import PdfRejected
+from gemini_client import available_model_names
+from resilience import get_gemini_guard, CircuitOpenError
+from pipeline import StreamingJob, FutureGroup, AnalysisCancelled, submit
+from warmup import start_background_warmup
+from resume_core import EXTRACTOR_VERSION, ANALYSIS_SECTIONS, extract_text_cached, score_resume, produce_analysis, start_section_analysis
+from resume_core import score_resume_sections, start_incremental_analysis
+from resume_sections import split_sections
+from metrics import increment
 
 # Load environment variables
 load_dotenv()
 
-# Configure Google Gemini AI
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+# Preload heavy dependencies in the background when WARMUP_ON_START=1
+start_background_warmup()
 
-# Function to extract text from PDF
-def extract_text_from_pdf(pdf_path):
-    text = ""
-    try:
-        # Try direct text extraction
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text
-
-        if text.strip():
-            return text.strip()
-    except Exception as e:
-        print(f"Direct text extraction failed: {e}")
-
-    # Fallback to OCR for image-based PDFs
-    print("Falling back to OCR for image-based PDF.")
-    try:
-        images = convert_from_path(pdf_path)
-        for image in images:
-            page_text = pytesseract.image_to_string(image)
-            text += page_text + "\n"
-    except Exception as e:
-        print(f"OCR failed: {e}")
-
-    return text.strip()
-
-# Function to calculate ATS score
-def calculate_ats_score(resume_text, job_description):
-    if not resume_text or not job_description:
-        return 0
-
-    resume_words = set(re.findall(r'\b\w+\b', resume_text.lower()))
-    job_desc_words = set(re.findall(r'\b\w+\b', job_description.lower()))
-
-    matched_keywords = resume_words.intersection(job_desc_words)
-    ats_score = (len(matched_keywords) / len(job_desc_words)) * 100 if job_desc_words else 0
-
-    return round(ats_score, 2)
-
-# Function to get response from Gemini AI
-# Modify the analyze_resume function
-def analyze_resume(resume_text, job_description=None):
-    if not resume_text:
-        return {"error": "Resume text is required for analysis."}
-
-    model = genai.GenerativeModel("gemini-1.5-flash")
-    
-    base_prompt = f"""
-    Act as an expert Resume Critique Bot with extensive experience in professional resume writing and HR. Analyze the provided resume and provide detailed feedback in the following structured format:
-
-    1. OVERALL IMPRESSION:
-    - Provide a brief overview of the resume's effectiveness
-    - Comment on the resume's organization and clarity
-
-    2. CONTENT ANALYSIS:
-    - Professional Experience
-    - Education
-    - Skills and Competencies
-    - Achievements and Impact
-    - Technical Proficiency
-
-    3. FORMATTING AND PRESENTATION:
-    - Layout and Design
-    - Use of Action Verbs
-    - Consistency
-    - Professional Tone
-
-    4. SPECIFIC RECOMMENDATIONS:
-    - List 3-5 concrete improvements
-    - Suggest better ways to phrase key experiences
-    - Recommend additional sections if needed
-
-    5. INDUSTRY ALIGNMENT:
-    - Evaluate market readiness
-    - Suggest industry-specific optimizations
-
-    6. SKILL ENHANCEMENT:
-    - Recommend relevant certifications
-    - Suggest courses for skill development
-    - Identify trending skills in the field
-
-    Resume:
-    {resume_text}
-    """
-
-    if job_description:
-        base_prompt += f"""
-        7. JOB MATCH ANALYSIS:
-        - Compare resume against job requirements
-        - Identify missing key qualifications
-        - Suggest tailoring strategies
-
-        Job Description:
-        {job_description}
-        """
-
-    response = model.generate_content(base_prompt)
-    return response.text.strip()
+# Render the analysis as it streams in (set STREAM_ANALYSIS=0 to wait for the full response)
+STREAM_ANALYSIS = os.getenv("STREAM_ANALYSIS", "1") == "1"
 
 # After the imports, add the consolidated CSS
 # In the CUSTOM_STYLES, update the .stApp class
@@ -222,46 +131,324 @@ else:
 
 st.markdown("<div style='padding-top: 10px;'></div>", unsafe_allow_html=True)
 
+# Let users trade quality for speed when more than one model is configured
+model_names = available_model_names()
+model_name = st.sidebar.selectbox("Gemini model", model_names) if len(model_names) > 1 else None
+
+ATS_MODES = {"Keyword match": "keyword", "Weighted skills": "weighted"}
+default_ats_mode = 1 if os.getenv("ATS_SCORING_MODE", "keyword") == "weighted" else 0
+ats_mode = ATS_MODES[st.sidebar.radio("ATS scoring", list(ATS_MODES), index=default_ats_mode)]
+
+# Sectioned mode requests each critique section separately, in parallel, and caches them one by one.
+# Resume section mode critiques each part of the resume on its own, so a revised
+# upload only sends the parts that changed to Gemini.
+analysis_mode = st.sidebar.radio("Analysis mode", ["Full critique", "By section", "By resume section"])
+sectioned = analysis_mode == "By section"
+incremental = analysis_mode == "By resume section"
+section_titles = {section["title"]: section["id"] for section in ANALYSIS_SECTIONS}
+selected_sections = [
+    section_titles[title]
+    for title in st.sidebar.multiselect("Sections", list(section_titles), default=list(section_titles))
+] if sectioned else None
+
+# Results live in session_state keyed by the inputs they depend on, so reruns caused by
+# other widgets (the sidebar, editing the JD) reuse them instead of re-extracting,
+# re-scoring or calling Gemini again
+MEMO_ENTRIES = 8
+rerun_stats = st.session_state.setdefault(
+    "rerun_stats", {"reruns": 0, "computed": 0, "recomputed": 0, "critiques": 0, "repeated_critiques": 0}
+)
+rerun_stats["reruns"] += 1
+computed_before = rerun_stats["computed"]
+computed_keys = st.session_state.setdefault("computed_keys", set())
+
+# Function to store a result for its input key, keeping the last few per kind
+def remember(name, key, value):
+    memo = st.session_state.setdefault(f"memo_{name}", {})
+    memo[key] = value
+    if len(memo) > MEMO_ENTRIES:
+        memo.pop(next(iter(memo)))
+    rerun_stats["computed"] += 1
+    if hash((name, key)) in computed_keys:
+        rerun_stats["recomputed"] += 1
+    computed_keys.add(hash((name, key)))
+    return value
+
+# Function to return the remembered result for key, or None
+def recall(name, key):
+    return st.session_state.get(f"memo_{name}", {}).get(key)
+
+# Function to compute a result only when its inputs changed
+def memoized(name, key, compute):
+    value = recall(name, key)
+    return value if value is not None else remember(name, key, compute())
+
+# Function to start computing a result on the pipeline pool only when its inputs changed.
+# Returns a function that waits for the result and remembers it.
+def memoized_future(name, key, compute, *args):
+    value = recall(name, key)
+    if value is not None:
+        return lambda: value
+    future = submit(compute, *args)
+    return lambda: remember(name, key, future.result())
+
+def analysis_box(text, heading=None):
+    # Headings are resume section titles taken from the uploaded PDF
+    heading = f"<h3>{html.escape(heading)}</h3>" if heading else ""
+    return f'<div class="content-box"><div class="analysis-text">{heading}{text}</div></div>'
+
+# Function to show what changed since the previous version of the resume
+def render_section_diff(section_diff, resume_sections, previous_sections):
+    if section_diff is None:
+        st.caption("First version of this resume: every section is analyzed.")
+        return
+    titles = {section["key"]: section["title"] for section in resume_sections}
+    st.markdown(
+        f"**What changed since the previous version:** {len(section_diff['changed'])} changed, "
+        f"{len(section_diff['added'])} added, {len(section_diff['removed'])} removed, "
+        f"{len(section_diff['unchanged'])} unchanged ({len(section_diff['cached'])} reused from cache)"
+    )
+    with st.expander("Show changes"):
+        # Line diffs need the previous text, which only this session has
+        old_texts = {section["key"]: section["text"] for section in previous_sections} \
+            if section_diff["source"] == "session" else {}
+        new_texts = {section["key"]: section["text"] for section in resume_sections}
+        for key in section_diff["changed"] + section_diff["added"]:
+            st.markdown(f"**{titles[key]}**" + (" (new)" if key in section_diff["added"] else ""))
+            if key in old_texts:
+                changes = difflib.unified_diff(
+                    old_texts[key].splitlines(), new_texts[key].splitlines(), lineterm="", n=1)
+                st.code("\n".join(list(changes)[2:]), language="diff")
+        for key in section_diff["removed"]:
+            st.markdown(f"**{key}** (removed)")
+
+def render_prompt_report(prompt_report):
+    if prompt_report:
+        st.caption(
+            f"Prompt size: {prompt_report['tokens_before']} → {prompt_report['tokens_after']} tokens"
+            f"{'' if prompt_report['counted'] else ' (estimated)'}"
+            f"{', inputs trimmed to fit the token budget' if prompt_report['truncated'] else ''}"
+        )
+
+# Function to redraw a finished analysis from session_state
+def render_analysis(analysis):
+    if analysis["kind"] == "resume_sections":
+        render_section_diff(analysis["diff"], analysis["resume_sections"], analysis["previous_sections"])
+    for heading, text in analysis["boxes"]:
+        st.markdown(analysis_box(text, heading), unsafe_allow_html=True)
+    render_prompt_report(analysis["prompt_report"])
+
+# Function to start the selected kind of analysis on the pipeline pool. Returns a
+# function that draws results as they arrive and returns the finished analysis
+# for session_state, so the critique generates while the other tabs render.
+def start_analysis(resume_text):
+    prompt_report = {}
+    if incremental:
+        # Compare with the version analyzed earlier in this session (or a stored one)
+        previous_sections = st.session_state.get("resume_sections") or []
+        resume_sections, section_diff, futures = start_incremental_analysis(
+            resume_text, job_description, model_name, previous_sections)
+        st.session_state["resume_sections"] = resume_sections
+        st.session_state["analysis_job"] = (upload_id, FutureGroup(futures.values()))
+
+        def finish_incremental():
+            render_section_diff(section_diff, resume_sections, previous_sections)
+            labels = {} if section_diff is None else {
+                **{key: "updated" for key in section_diff["changed"]},
+                **{key: "new" for key in section_diff["added"]},
+                **{key: "unchanged" for key in section_diff["unchanged"]},
+            }
+            # One box per resume section, in document order
+            boxes = []
+            for section in resume_sections:
+                label = labels.get(section["key"])
+                boxes.append((f"{section['title']}{f' ({label})' if label else ''}", futures[section["key"]].result()))
+                st.markdown(analysis_box(boxes[-1][1], boxes[-1][0]), unsafe_allow_html=True)
+            st.session_state.pop("analysis_job", None)
+            return {"kind": "resume_sections", "boxes": boxes, "diff": section_diff, "prompt_report": None,
+                    "resume_sections": resume_sections, "previous_sections": previous_sections}
+        return finish_incremental
+
+    if sectioned:
+        section_futures = start_section_analysis(resume_text, job_description, selected_sections, model_name)
+        st.session_state["analysis_job"] = (upload_id, FutureGroup(section_futures.values()))
+
+        def finish_sections():
+            # One box per section, filled in whichever order the sections finish
+            section_boxes = {section_id: st.empty() for section_id in section_futures}
+            section_ids = {future: section_id for section_id, future in section_futures.items()}
+            for future in as_completed(section_ids):
+                section_boxes[section_ids[future]].markdown(analysis_box(future.result()), unsafe_allow_html=True)
+            st.session_state.pop("analysis_job", None)
+            return {"kind": "sections", "prompt_report": None,
+                    "boxes": [(None, future.result()) for future in section_futures.values()]}
+        return finish_sections
+
+    analysis_job = StreamingJob(
+        lambda emit: produce_analysis(emit, resume_text, job_description, model_name,
+                                      STREAM_ANALYSIS, prompt_report.update)
+    )
+    st.session_state["analysis_job"] = (upload_id, analysis_job)
+
+    def finish_full():
+        analysis_box_area = st.empty()
+        # Show each chunk as soon as Gemini produces it
+        chunks = []
+        for chunk in analysis_job.chunks():
+            chunks.append(chunk)
+            analysis_box_area.markdown(analysis_box("".join(chunks)), unsafe_allow_html=True)
+        analysis = analysis_job.result()
+        st.session_state.pop("analysis_job", None)
+        analysis_box_area.markdown(analysis_box(analysis), unsafe_allow_html=True)
+        render_prompt_report(prompt_report)
+        return {"kind": "full", "boxes": [(None, analysis)], "prompt_report": dict(prompt_report)}
+    return finish_full
+
+# Work straight from the in-memory upload so concurrent sessions never share a file
+pdf_bytes = uploaded_file.getvalue() if uploaded_file else None
+extraction_cache = get_extraction_cache()
+upload_id = extraction_cache.make_key(pdf_bytes, EXTRACTOR_VERSION) if pdf_bytes else None
+
+# Whitespace-only edits to the job description do not change any result
+jd_key = " ".join((job_description or "").split())
+
+# A critique still generating for a previous upload is no longer wanted, in any mode
+running = st.session_state.get("analysis_job")
+if running and running[0] != upload_id:
+    running[1].cancel()
+    del st.session_state["analysis_job"]
+
+# Function run on the pipeline pool: extracts an upload and collects the notes about it
+def extract_upload(pdf_bytes):
+    notes = []
+    return extract_text_cached(pdf_bytes, notes), notes
+
 if uploaded_file:
-    # Save uploaded file locally for processing
-    with open("uploaded_resume.pdf", "wb") as f:
-        f.write(uploaded_file.getbuffer())
-
-    # Extract text from PDF
-    resume_text = extract_text_from_pdf("uploaded_resume.pdf")
-
-    # Update the success message
-    # In the analyze button section, remove the duplicate CSS and just use the content HTML:
-    if st.button("Analyze Resume"):
-        with st.spinner("Analyzing your resume..."):
-            try:
-                analysis = analyze_resume(resume_text, job_description)
-                ats_score = calculate_ats_score(resume_text, job_description)
-                
+    # Extracted once per upload, starting before the sidebar is drawn; later reruns
+    # read it from session_state
+    extraction = memoized_future("extraction", upload_id, extract_upload, pdf_bytes)
+    cache_stats = extraction_cache.snapshot()
+    st.sidebar.caption(
+        f"Extraction cache: {cache_stats['memory_hits']} memory hits, "
+        f"{cache_stats['disk_hits']} disk hits, {cache_stats['misses']} misses "
+        f"(hit rate {cache_stats['hit_rate']:.0%})"
+    )
+    guard_stats = get_gemini_guard().snapshot()
+    st.sidebar.caption(
+        f"Gemini: {guard_stats['in_flight']} in flight, {guard_stats['waiting']} queued, "
+        f"avg wait {guard_stats['avg_wait_seconds']}s, {guard_stats['retries']} retries, "
+        f"circuit {guard_stats['circuit']}"
+    )
+
+    try:
+        with st.spinner("Reading your resume..."):
+            resume_text, extraction_notes = extraction()
+        # Pages skipped or budgets exhausted while reading this upload
+        for note in extraction_notes:
+            st.warning(note)
+
+        analyze_clicked = st.button("Analyze Resume")
+        tab1, tab2, tab3 = st.tabs(["Detailed Analysis", "ATS Score", "Job Matches"])
+
+        # The ATS score follows the job description as it is edited; it never calls Gemini.
+        # It is scored on the pipeline pool next to the job matches, submitted before any
+        # critique so it never waits behind one.
+        if incremental:
+            # Only sections not scored before are tokenized again
+            upload_sections = memoized("upload_sections", upload_id, lambda: split_sections(resume_text))
+            ats = memoized_future("ats", (upload_id, jd_key, ats_mode),
+                                  score_resume_sections, upload_sections, job_description, ats_mode)
+        else:
+            ats = memoized_future("ats", (upload_id, jd_key, ats_mode),
+                                  score_resume, resume_text, job_description, ats_mode)
+        # Rank the posting library too, when one has been built with jd_index.py
+        from jd_index import get_jd_index, default_index_path
+        has_job_library = os.path.exists(default_index_path())
+        job_matches = memoized_future("job_matches", upload_id, lambda: get_jd_index().top_k(resume_text, 10)) \
+            if has_job_library else None
+
+        # The same inputs are never sent to Gemini twice in a session
+        analysis_key = (upload_id, jd_key, model_name, analysis_mode, tuple(selected_sections or ()))
+        analysis = recall("analysis", analysis_key)
+        finish_analysis = None
+        if analysis is None and analyze_clicked:
+            rerun_stats["critiques"] += 1
+            if hash(("analysis", analysis_key)) in computed_keys:
+                rerun_stats["repeated_critiques"] += 1
+            if "analysis_job" in st.session_state:
+                st.session_state["analysis_job"][1].cancel()
+            # Gemini runs on its own pool while the ATS score and job matches are drawn
+            finish_analysis = start_analysis(resume_text)
+
+        ats_result = ats()
+        ats_score = ats_result["score"]
+        with tab2:
+            content = f"""
+            <div class="content-box">
+                <div class="analysis-text">
+                    <h2>ATS Compatibility Score</h2>
+                    {f'<p class="ats-score">🔹 ATS Score: {ats_score}%</p>' if job_description else '<p>Please provide a job description to calculate ATS score</p>'}
+                    {
+                        f'<div class="{"success" if ats_score > 80 else "warning" if ats_score > 50 else "error"}">'
+                        f'{"Excellent ATS Optimization!" if ats_score > 80 else "Room for ATS Optimization" if ats_score > 50 else "Needs significant ATS optimization"}'
+                        '</div>' if job_description else ''
+                    }
+            </div>
+            """
+            st.markdown(content, unsafe_allow_html=True)
+            if ats_result["matched"] or ats_result["missing"]:
+                st.markdown("**Matched terms:** " + (", ".join(ats_result["matched"]) or "none"))
+                st.markdown("**Missing terms:** " + (", ".join(ats_result["missing"]) or "none"))
+
+        with tab3:
+            if not has_job_library:
+                st.info("No job library found. Build one with `python jd_index.py sync <postings folder>`.")
+            else:
+                job_matches = job_matches()
+                if job_matches:
+                    st.markdown("### Best matching open positions")
+                    st.table([
+                        {"Rank": rank, "Position": match["title"], "Job ID": match["job_id"], "Match %": match["score"]}
+                        for rank, match in enumerate(job_matches, start=1)
+                    ])
+                else:
+                    st.info("None of the postings in the job library match this resume.")
+
+        with tab1:
+            if analysis is not None:
+                st.session_state["latest_analysis"] = analysis_key
+                render_analysis(analysis)
+            elif finish_analysis is not None:
+                with st.spinner("Analyzing your resume..."):
+                    remember("analysis", analysis_key, finish_analysis())
+                st.session_state["latest_analysis"] = analysis_key
                 st.success("Resume Analysis Complete!")
-                tab1, tab2 = st.tabs(["Detailed Analysis", "ATS Score"])
-                
-                with tab1:
-                    st.markdown(f'<div class="content-box"><div class="analysis-text">{analysis}</div></div>', 
-                              unsafe_allow_html=True)
-                
-                with tab2:
-                    content = f"""
-                    <div class="content-box">
-                        <div class="analysis-text">
-                            <h2>ATS Compatibility Score</h2>
-                            {f'<p class="ats-score">🔹 ATS Score: {ats_score}%</p>' if job_description else '<p>Please provide a job description to calculate ATS score</p>'}
-                            {
-                                f'<div class="{"success" if ats_score > 80 else "warning" if ats_score > 50 else "error"}">'
-                                f'{"Excellent ATS Optimization!" if ats_score > 80 else "Room for ATS Optimization" if ats_score > 50 else "Needs significant ATS optimization"}'
-                                '</div>' if job_description else ''
-                            }
-                    </div>
-                    """
-                    st.markdown(content, unsafe_allow_html=True)
-
-            except Exception as e:
-                st.error(f"Analysis failed: {e}")
+            else:
+                # Keep showing the last critique of this resume until the user asks for a new one
+                latest_key = st.session_state.get("latest_analysis")
+                latest = recall("analysis", latest_key) if latest_key and latest_key[0] == upload_id else None
+                if latest is not None:
+                    st.caption("The job description or options changed since this analysis. "
+                               "Click **Analyze Resume** to update it.")
+                    render_analysis(latest)
+                else:
+                    st.info("Click **Analyze Resume** for a detailed critique of the current resume and job description.")
+    except PdfRejected as e:
+        st.error(f"This resume cannot be read: {e}")
+    except AnalysisCancelled:
+        st.info("Analysis cancelled.")
+    except CircuitOpenError as e:
+        st.error(f"Analysis is paused because Gemini is not responding. Please try again in {e.retry_after:.0f} seconds.")
+    except Exception as e:
+        st.error(f"Analysis failed: {e}")
+
+# Reruns that found every result in session_state did no work at all
+increment("streamlit_reruns_total", work="computed" if rerun_stats["computed"] > computed_before else "none")
+st.sidebar.caption(
+    f"This session: {rerun_stats['reruns']} reruns, {rerun_stats['computed']} results computed "
+    f"({rerun_stats['recomputed']} recomputed), {rerun_stats['critiques']} critiques requested "
+    f"({rerun_stats['repeated_critiques']} repeated)"
+)
 
 # Footer
 st.markdown("---")
@@ -0,0 +1,216 @@
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+# Per-stage timing and counters for the resume pipeline.
+#
+# span("stage") times a block of work and records it in a histogram of stage
+# durations; increment() counts events such as OCR fallbacks and cache hits.
+# Everything is exported two ways:
+#   - structured JSON log lines, one per span, when METRICS_LOG is
+#     "stderr", "stdout" or a file path
+#   - Prometheus text format from render_prometheus(), served by api_server.py
+#     at /metrics and written every METRICS_FILE_INTERVAL seconds to
+#     METRICS_FILE (e.g. for node_exporter's textfile collector)
+# Metrics are per process; OCR workers send their page timings back to the
+# parent, which records them, and isolated extraction workers send everything
+# they recorded (see extraction_guard.py).
+
+PREFIX = "resume_"
+
+# Histogram buckets in seconds, from a cached lookup up to a slow OCR or Gemini call
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+HELP = {
+    "stage_seconds": "Duration of each pipeline stage in seconds.",
+    "stage_errors_total": "Pipeline stages that raised an exception.",
+    "ocr_fallbacks_total": "Documents or pages sent to OCR because they had no usable text layer.",
+    "ocr_page_failures_total": "Pages that could not be OCR'd.",
+    "extraction_failures_total": "Documents whose text layer could not be read.",
+    "extraction_engine_total": "Text-layer extraction attempts by engine and outcome (chosen, garbled or failed).",
+    "extraction_guard_total": "Guarded extractions by outcome (ok, partial, timeout, memory, crashed, failed, rejected).",
+    "cache_events_total": "Cache lookups by cache and outcome.",
+    "gemini_tokens_total": "Gemini tokens by kind (prompt or output).",
+    "streamlit_reruns_total": "Streamlit script reruns, by whether any result had to be computed.",
+}
+
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(label_key, extra=()):
+    pairs = list(label_key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        key + '="' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for key, value in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+class Metrics:
+    def __init__(self, log_target=None):
+        self._lock = threading.Lock()
+        self._log_lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self.log_target = log_target
+
+    def increment(self, name, amount=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {"buckets": [0] * len(BUCKETS), "sum": 0.0, "count": 0}
+            for index, bound in enumerate(BUCKETS):
+                if value <= bound:
+                    histogram["buckets"][index] += 1
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    # Function to copy the counters and histograms, e.g. to send them to another process
+    def export(self):
+        with self._lock:
+            return {
+                "counters": list(self._counters.items()),
+                "histograms": [(key, {"buckets": list(value["buckets"]), "sum": value["sum"], "count": value["count"]})
+                               for key, value in self._histograms.items()],
+            }
+
+    # Function to add metrics exported by another process, such as an extraction worker
+    def merge(self, state):
+        with self._lock:
+            for key, value in state["counters"]:
+                self._counters[key] = self._counters.get(key, 0) + value
+            for key, other in state["histograms"]:
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = {"buckets": [0] * len(BUCKETS), "sum": 0.0, "count": 0}
+                histogram["buckets"] = [a + b for a, b in zip(histogram["buckets"], other["buckets"])]
+                histogram["sum"] += other["sum"]
+                histogram["count"] += other["count"]
+
+    # Function to write one JSON log line; does nothing unless a log target is set
+    def log(self, event, **fields):
+        if not self.log_target:
+            return
+        line = json.dumps({"ts": round(time.time(), 3), "event": event, **fields}, default=str)
+        with self._log_lock:
+            if self.log_target in ("stderr", "stdout"):
+                stream = sys.stderr if self.log_target == "stderr" else sys.stdout
+                print(line, file=stream, flush=True)
+            else:
+                try:
+                    with open(self.log_target, "a", encoding="utf-8") as f:
+                        f.write(line + "\n")
+                except OSError as e:
+                    print(f"Metrics log write failed: {e}")
+
+    # Time a stage. The yielded dict collects extra fields for the log line
+    # (page counts, token counts, ...); failures are counted and re-raised.
+    @contextmanager
+    def span(self, stage, **fields):
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            yield fields
+        except GeneratorExit:
+            # A streaming consumer stopped early, e.g. the user cancelled
+            status = "cancelled"
+            raise
+        except BaseException as e:
+            status = "error"
+            fields["error"] = f"{type(e).__name__}: {e}"
+            self.increment("stage_errors_total", stage=stage)
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            self.observe("stage_seconds", seconds, stage=stage)
+            self.log("span", stage=stage, seconds=round(seconds, 4), status=status, **fields)
+
+    # Function to render every metric in the Prometheus text exposition format
+    def render_prometheus(self):
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: {"buckets": list(value["buckets"]), "sum": value["sum"], "count": value["count"]}
+                          for key, value in self._histograms.items()}
+
+        lines = []
+        for name in sorted({name for name, _ in counters}):
+            full_name = PREFIX + name
+            lines.append(f"# HELP {full_name} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {full_name} counter")
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{full_name}{_format_labels(labels)} {value}")
+
+        for name in sorted({name for name, _ in histograms}):
+            full_name = PREFIX + name
+            lines.append(f"# HELP {full_name} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {full_name} histogram")
+            for (metric, labels), histogram in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                for bound, count in zip(BUCKETS, histogram["buckets"]):
+                    lines.append(f"{full_name}_bucket{_format_labels(labels, [('le', str(bound))])} {count}")
+                lines.append(f"{full_name}_bucket{_format_labels(labels, [('le', '+Inf')])} {histogram['count']}")
+                lines.append(f"{full_name}_sum{_format_labels(labels)} {histogram['sum']:.6f}")
+                lines.append(f"{full_name}_count{_format_labels(labels)} {histogram['count']}")
+        return "\n".join(lines) + "\n"
+
+    # Write the Prometheus text atomically so scrapers never see a partial file
+    def write_prometheus_file(self, path):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(self.render_prometheus())
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Metrics file write failed: {e}")
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def _write_periodically(metrics, path, interval):
+    while True:
+        time.sleep(interval)
+        metrics.write_prometheus_file(path)
+
+
+# Process-wide metrics; starts the METRICS_FILE writer on first use
+def get_metrics():
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = Metrics(os.getenv("METRICS_LOG") or None)
+            path = os.getenv("METRICS_FILE")
+            if path:
+                interval = float(os.getenv("METRICS_FILE_INTERVAL", "15"))
+                threading.Thread(
+                    target=_write_periodically, args=(_metrics, path, interval), name="metrics-file", daemon=True
+                ).start()
+        return _metrics
+
+
+def span(stage, **fields):
+    return get_metrics().span(stage, **fields)
+
+
+def increment(name, amount=1, **labels):
+    get_metrics().increment(name, amount, **labels)
+
+
+def observe(name, value, **labels):
+    get_metrics().observe(name, value, **labels)
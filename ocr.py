@@ -0,0 +1,261 @@
+import os
+import re
+import time
+import tempfile
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from metrics import span, increment, observe
+
+# Parallel OCR for scanned PDF pages.
+# Each worker rasterizes exactly one page and OCRs it, so the parent never
+# holds page images and peak memory is bounded by the number of pages in
+# flight rather than by the page count of the document.
+# pdf2image and pytesseract are imported where they are used so the app can
+# start without loading them.
+
+
+# Function to read OCR tuning from the environment.
+# Defaults are tuned for single-column resume text: LSTM engine, page
+# segmentation mode 4 (one column of variable-size text), English only.
+def get_ocr_settings(**overrides):
+    settings = {
+        "target_pixels": int(os.getenv("OCR_TARGET_PIXELS", "2600")),
+        "min_dpi": int(os.getenv("OCR_MIN_DPI", "150")),
+        "max_dpi": int(os.getenv("OCR_MAX_DPI", "300")),
+        "grayscale": os.getenv("OCR_GRAYSCALE", "1") == "1",
+        "binarize_threshold": int(os.getenv("OCR_BINARIZE_THRESHOLD", "0")),
+        "crop_margins": os.getenv("OCR_CROP_MARGINS", "1") == "1",
+        "psm": int(os.getenv("OCR_PSM", "4")),
+        "oem": int(os.getenv("OCR_OEM", "1")),
+        "lang": os.getenv("OCR_LANG", "eng"),
+    }
+    settings.update(overrides)
+    return settings
+
+
+# Function to pick a DPI so the longer page edge renders to about target_pixels
+def choose_dpi(page_size, settings):
+    if not page_size:
+        return settings["max_dpi"]
+    long_edge_inches = max(page_size) / 72
+    if long_edge_inches <= 0:
+        return settings["max_dpi"]
+    dpi = int(settings["target_pixels"] / long_edge_inches)
+    return max(settings["min_dpi"], min(settings["max_dpi"], dpi))
+
+
+# Function to clean up a rasterized page before it reaches Tesseract
+def preprocess_image(image, settings):
+    if settings["grayscale"] and image.mode != "L":
+        image = image.convert("L")
+
+    if settings["crop_margins"]:
+        gray = image if image.mode == "L" else image.convert("L")
+        # Anything darker than near-white counts as content
+        bbox = gray.point(lambda p: 255 if p < 240 else 0).getbbox()
+        if bbox:
+            pad = 10
+            left, top, right, bottom = bbox
+            image = image.crop((
+                max(0, left - pad), max(0, top - pad),
+                min(image.width, right + pad), min(image.height, bottom + pad),
+            ))
+
+    threshold = settings["binarize_threshold"]
+    if threshold:
+        if image.mode != "L":
+            image = image.convert("L")
+        image = image.point(lambda p: 255 if p > threshold else 0)
+
+    return image
+
+
+def tesseract_config(settings):
+    return f"--oem {settings['oem']} --psm {settings['psm']}"
+
+
+# Function to OCR an already rasterized and preprocessed image
+def ocr_image(image, settings):
+    import pytesseract
+
+    return pytesseract.image_to_string(
+        image, lang=settings["lang"], config=tesseract_config(settings)
+    )
+
+
+# Function run inside a worker process: rasterize and OCR one page (1-based).
+# Returns (text, rasterize_seconds, ocr_seconds); the parent records the timings.
+def _ocr_page(pdf_path, page_number, settings, page_size=None):
+    from pdf2image import convert_from_path
+
+    start = time.perf_counter()
+    images = convert_from_path(
+        pdf_path,
+        dpi=choose_dpi(page_size, settings),
+        first_page=page_number,
+        last_page=page_number,
+        grayscale=settings["grayscale"],
+        thread_count=1,
+    )
+    rasterized = time.perf_counter()
+    try:
+        text = "\n".join(ocr_image(preprocess_image(image, settings), settings) for image in images)
+        return text, rasterized - start, time.perf_counter() - rasterized
+    finally:
+        for image in images:
+            image.close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _worker_count():
+    return int(os.getenv("OCR_WORKERS", "0")) or os.cpu_count() or 1
+
+
+# Process-wide pool sized to the available cores
+def get_ocr_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            context = multiprocessing.get_context(os.getenv("OCR_START_METHOD", "spawn"))
+            _pool = ProcessPoolExecutor(max_workers=_worker_count(), mp_context=context)
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+# Give poppler a path to rasterize. Paths are used as-is; in-memory uploads
+# are written to a private temporary file that is removed afterwards.
+@contextmanager
+def rasterizable_path(pdf_source):
+    if isinstance(pdf_source, (str, os.PathLike)):
+        yield pdf_source
+        return
+
+    if isinstance(pdf_source, (bytes, bytearray, memoryview)):
+        data = bytes(pdf_source)
+    else:
+        pdf_source.seek(0)
+        data = pdf_source.read()
+
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    try:
+        with span("persist_upload", bytes=len(data)):
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+        yield path
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+# Function to count pages without opening the PDF in Python
+def count_pdf_pages(pdf_path):
+    from pdf2image import pdfinfo_from_path
+
+    return int(pdfinfo_from_path(pdf_path)["Pages"])
+
+
+# Function to read the first page size in points from pdfinfo, e.g. "612 x 792 pts (letter)"
+def default_page_size(pdf_path):
+    from pdf2image import pdfinfo_from_path
+
+    try:
+        info = pdfinfo_from_path(pdf_path)
+    except Exception:
+        return None
+    match = re.match(r"\s*([\d.]+)\s*x\s*([\d.]+)", str(info.get("Page size", "")))
+    return (float(match.group(1)), float(match.group(2))) if match else None
+
+
+def _record_page(timings):
+    text, rasterize_seconds, ocr_seconds = timings
+    observe("stage_seconds", rasterize_seconds, stage="rasterize")
+    observe("stage_seconds", ocr_seconds, stage="ocr_page")
+    return text
+
+
+def _page_failed(page_number, error):
+    print(f"OCR failed for page {page_number}: {error}")
+    increment("ocr_page_failures_total")
+    return ""
+
+
+# Function to OCR the given pages in parallel; returns texts in page order.
+# page_sizes optionally maps page number to (width, height) in points; on_page(number, text)
+# is called as each page finishes.
+def ocr_pages(pdf_path, page_numbers, max_in_flight=None, settings=None, page_sizes=None, on_page=None):
+    page_numbers = list(page_numbers)
+    if not page_numbers:
+        return []
+    if max_in_flight is None:
+        max_in_flight = int(os.getenv("OCR_MAX_IN_FLIGHT", "0")) or _worker_count()
+    if settings is None:
+        settings = get_ocr_settings()
+    page_sizes = dict(page_sizes or {})
+    fallback_size = None
+    if any(number not in page_sizes for number in page_numbers):
+        fallback_size = default_page_size(pdf_path)
+
+    if _worker_count() == 1:
+        # Single worker (e.g. inside a batch worker process): OCR inline, one page at a time
+        texts = []
+        for number in page_numbers:
+            try:
+                texts.append(_record_page(_ocr_page(pdf_path, number, settings, page_sizes.get(number, fallback_size))))
+            except Exception as e:
+                texts.append(_page_failed(number, e))
+            if on_page is not None:
+                on_page(number, texts[-1])
+        return texts
+
+    pool = get_ocr_pool()
+    results = {}
+    pending = {}
+    remaining = iter(page_numbers)
+
+    def submit_next():
+        number = next(remaining, None)
+        if number is not None:
+            size = page_sizes.get(number, fallback_size)
+            pending[pool.submit(_ocr_page, pdf_path, number, settings, size)] = number
+
+    try:
+        # Keep at most max_in_flight pages rasterized at any time
+        for _ in range(max_in_flight):
+            submit_next()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                number = pending.pop(future)
+                try:
+                    results[number] = _record_page(future.result())
+                except BrokenProcessPool:
+                    raise
+                except Exception as e:
+                    results[number] = _page_failed(number, e)
+                if on_page is not None:
+                    on_page(number, results[number])
+                submit_next()
+    except BrokenProcessPool as e:
+        print(f"OCR worker pool crashed: {e}")
+        increment("ocr_page_failures_total", len(pending))
+        _reset_pool()
+        for future in pending:
+            future.cancel()
+
+    return [results.get(number, "") for number in page_numbers]
@@ -0,0 +1,107 @@
+import os
+import sys
+import time
+import argparse
+import itertools
+from difflib import SequenceMatcher
+
+from ocr import get_ocr_settings, count_pdf_pages, default_page_size, _ocr_page
+
+# Measure OCR speed and accuracy for different preprocessing settings.
+#
+# The corpus directory holds scanned PDFs next to reference transcripts with
+# the same name (resume.pdf + resume.txt). Every combination of the given
+# options is run page by page on one core, rasterizing one page at a time as
+# the app does, and the table reports seconds per page and character
+# similarity against the reference text.
+#
+#   python ocr_benchmark.py corpus/ --target-pixels 2000 2600 3300 --psm 3 4 6 --binarize 0 180
+
+
+def normalize(text):
+    return " ".join(text.lower().split())
+
+
+# Function to OCR one PDF with the given settings; returns (text, pages, seconds)
+def run_document(pdf_path, settings):
+    pages = count_pdf_pages(pdf_path)
+    page_size = default_page_size(pdf_path)
+    texts = []
+    start = time.perf_counter()
+    for page_number in range(1, pages + 1):
+        text, _, _ = _ocr_page(pdf_path, page_number, settings, page_size)
+        texts.append(text)
+    elapsed = time.perf_counter() - start
+    return "\n".join(texts), pages, elapsed
+
+
+def load_corpus(corpus_dir):
+    corpus = []
+    for name in sorted(os.listdir(corpus_dir)):
+        if not name.lower().endswith(".pdf"):
+            continue
+        reference_path = os.path.join(corpus_dir, os.path.splitext(name)[0] + ".txt")
+        if not os.path.exists(reference_path):
+            print(f"Skipping {name}: no reference transcript")
+            continue
+        with open(reference_path, "r", encoding="utf-8") as f:
+            corpus.append((os.path.join(corpus_dir, name), normalize(f.read())))
+    return corpus
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare OCR settings on a reference corpus.")
+    parser.add_argument("corpus", help="directory of PDFs with matching .txt references")
+    parser.add_argument("--target-pixels", type=int, nargs="+", default=[get_ocr_settings()["target_pixels"]])
+    parser.add_argument("--psm", type=int, nargs="+", default=[get_ocr_settings()["psm"]])
+    parser.add_argument("--binarize", type=int, nargs="+", default=[get_ocr_settings()["binarize_threshold"]],
+                        help="binarization thresholds, 0 disables")
+    parser.add_argument("--crop", type=int, nargs="+", choices=[0, 1], default=[1])
+    parser.add_argument("--grayscale", type=int, nargs="+", choices=[0, 1], default=[1])
+    parser.add_argument("--min-accuracy-drop", type=float, default=0.01,
+                        help="accuracy loss tolerated when recommending the fastest setting")
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        print("No PDF/reference pairs found.")
+        return 1
+
+    rows = []
+    grid = itertools.product(args.target_pixels, args.psm, args.binarize, args.crop, args.grayscale)
+    for target_pixels, psm, threshold, crop, grayscale in grid:
+        settings = get_ocr_settings(
+            target_pixels=target_pixels, psm=psm, binarize_threshold=threshold,
+            crop_margins=bool(crop), grayscale=bool(grayscale),
+        )
+        total_pages = 0
+        total_seconds = 0.0
+        accuracies = []
+        for pdf_path, reference in corpus:
+            text, pages, seconds = run_document(pdf_path, settings)
+            total_pages += pages
+            total_seconds += seconds
+            accuracies.append(SequenceMatcher(None, reference, normalize(text), autojunk=False).ratio())
+        rows.append({
+            "settings": f"pixels={target_pixels} psm={psm} binarize={threshold} crop={crop} gray={grayscale}",
+            "seconds_per_page": total_seconds / max(total_pages, 1),
+            "accuracy": sum(accuracies) / len(accuracies),
+        })
+        print(f"{rows[-1]['settings']}: {rows[-1]['seconds_per_page']:.2f}s/page, "
+              f"accuracy {rows[-1]['accuracy']:.3f}", file=sys.stderr)
+
+    rows.sort(key=lambda row: row["seconds_per_page"])
+    print(f"{'settings':<60} {'s/page':>8} {'accuracy':>9}")
+    for row in rows:
+        print(f"{row['settings']:<60} {row['seconds_per_page']:>8.2f} {row['accuracy']:>9.3f}")
+
+    best_accuracy = max(row["accuracy"] for row in rows)
+    for row in rows:
+        if row["accuracy"] >= best_accuracy - args.min_accuracy_drop:
+            print(f"\nFastest setting within {args.min_accuracy_drop:.3f} of the best accuracy: {row['settings']}")
+            break
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
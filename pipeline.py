@@ -0,0 +1,105 @@
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Shared worker pools for the analysis pipeline.
+# Streamlit only lets the script thread draw widgets, so the slow steps
+# (extraction, ATS scoring, the Gemini call) run here and hand their results
+# back to the script thread, which renders each one as soon as it is ready.
+# Gemini calls get a pool of their own, sized to the Gemini concurrency limit:
+# threads waiting for Gemini can never hold up extraction or the ATS score.
+
+
+class AnalysisCancelled(Exception):
+    pass
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+# Process-wide thread pool shared by every session
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv("PIPELINE_WORKERS", "8")),
+                thread_name_prefix="analysis",
+            )
+        return _executor
+
+
+def submit(fn, *args, **kwargs):
+    return get_executor().submit(fn, *args, **kwargs)
+
+
+_gemini_executor = None
+
+
+# Process-wide thread pool for Gemini calls; more threads would only wait for the guard
+def get_gemini_executor():
+    global _gemini_executor
+    with _executor_lock:
+        if _gemini_executor is None:
+            _gemini_executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv("GEMINI_MAX_CONCURRENCY", "4")),
+                thread_name_prefix="gemini",
+            )
+        return _gemini_executor
+
+
+def submit_gemini(fn, *args, **kwargs):
+    return get_gemini_executor().submit(fn, *args, **kwargs)
+
+
+class FutureGroup:
+    # Futures started together for one analysis. cancel() drops the ones that have
+    # not started yet; a Gemini call already in flight finishes and is cached.
+    def __init__(self, futures):
+        self.futures = list(futures)
+
+    def cancel(self):
+        for future in self.futures:
+            future.cancel()
+
+
+_DONE = object()
+
+
+class StreamingJob:
+    # Runs produce(emit) on the Gemini pool. Every emit(chunk) is queued for the
+    # script thread, which reads them with chunks() and then calls result().
+    # cancel() makes the next emit raise AnalysisCancelled inside the worker.
+    def __init__(self, produce):
+        self.cancelled = threading.Event()
+        self._chunks = queue.Queue()
+        self.future = submit_gemini(self._run, produce)
+
+    def _run(self, produce):
+        try:
+            return produce(self._emit)
+        finally:
+            self._chunks.put(_DONE)
+
+    def _emit(self, chunk):
+        if self.cancelled.is_set():
+            raise AnalysisCancelled()
+        self._chunks.put(chunk)
+
+    def cancel(self):
+        self.cancelled.set()
+        self.future.cancel()
+
+    def chunks(self):
+        if self.future.cancelled():
+            return
+        while True:
+            chunk = self._chunks.get()
+            if chunk is _DONE:
+                return
+            yield chunk
+
+    def result(self, timeout=None):
+        return self.future.result(timeout)
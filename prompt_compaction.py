@@ -0,0 +1,162 @@
+import os
+import re
+from collections import Counter
+
+# Input compaction before text is sent to Gemini.
+#
+# OCR and PDF text layers carry a lot of bytes the model does not need:
+# headers and footers repeated on every page, page numbers, words broken
+# across lines with a hyphen, and long runs of spaces. Removing them leaves
+# the content unchanged but cuts input tokens. Inputs that are still too large
+# are trimmed to a token budget checked with the SDK's token counter.
+
+# Rough characters per token, used to avoid a count_tokens call for small prompts
+CHARS_PER_TOKEN = 4
+
+# Page markers: "Page 2", "Page 2 of 3", "2 of 3", "2/3"
+PAGE_NUMBER_RE = re.compile(
+    r"^\s*(?:page\s+(\d+)(?:\s*(?:of|/)\s*(\d+))?|(\d+)\s*(?:of|/)\s*(\d+))\s*$", re.IGNORECASE
+)
+# The same markers at the end of a running header or footer, e.g. "Jane Doe - Page 2"
+TRAILING_PAGE_NUMBER_RE = re.compile(
+    r"(?:\bpage\s+\d+(?:\s*(?:of|/)\s*\d+)?|\b\d+\s*(?:of|/)\s*\d+)\s*$", re.IGNORECASE
+)
+HYPHEN_BREAK_RE = re.compile(r"([a-z])-\n([a-z])")
+SPACES_RE = re.compile(r"[ \t ]+")
+BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+# Function to recognise a page marker. Bare numbers and dates are never page markers,
+# and the page number must fit the document: "2/3" only counts in a three-page text.
+def is_page_number(line, page_count):
+    match = PAGE_NUMBER_RE.match(line)
+    if not match:
+        return False
+    number = int(match.group(1) or match.group(3))
+    total = match.group(2) or match.group(4)
+    if total is not None:
+        return int(total) == page_count and 1 <= number <= page_count
+    return 1 <= number <= page_count
+
+
+# Function to drop page markers and header/footer lines repeated across pages.
+# Pages are separated by form feeds (as extract_text_from_pdf emits them). Page
+# markers are only dropped from a page's first or last line. A line counts as a
+# header (footer) when the same text is near the top (bottom) of most pages; the
+# first occurrence is kept so names and contact details survive.
+def strip_repeated_lines(text, edge_lines=3, max_length=80):
+    pages = [page.split("\n") for page in text.split("\f")]
+    if len(pages) < 2:
+        return text
+
+    def key(line):
+        # Only a page marker after other text is masked, so "Resume - Page 2" and
+        # "Resume - Page 3" match while "06/2021" and "3 of 4" stay different lines
+        line = line.strip().lower()
+        return line if PAGE_NUMBER_RE.match(line) else TRAILING_PAGE_NUMBER_RE.sub("#", line)
+
+    def edges(lines):
+        content = [index for index, line in enumerate(lines) if line.strip()]
+        return {"top": set(content[:edge_lines]), "bottom": set(content[-edge_lines:]),
+                "first": content[0] if content else None, "last": content[-1] if content else None}
+
+    page_edges = [edges(lines) for lines in pages]
+    counts = Counter()
+    for lines, edge in zip(pages, page_edges):
+        for side in ("top", "bottom"):
+            counts.update({(side, key(lines[index])) for index in edge[side]
+                           if len(lines[index].strip()) <= max_length})
+    min_repeats = max(2, len(pages) // 2)
+
+    kept_pages = []
+    seen = set()
+    for lines, edge in zip(pages, page_edges):
+        kept = []
+        for index, line in enumerate(lines):
+            if index in (edge["first"], edge["last"]) and is_page_number(line, len(pages)):
+                continue
+            sides = [side for side in ("top", "bottom") if index in edge[side]]
+            line_key = key(line)
+            if any(counts.get((side, line_key), 0) >= min_repeats for side in sides):
+                if line_key in seen:
+                    continue
+                seen.add(line_key)
+            kept.append(line)
+        kept_pages.append("\n".join(kept))
+    return "\n".join(kept_pages)
+
+
+# Function to normalize extracted text without changing its meaning
+def compact_text(text):
+    if not text:
+        return ""
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    text = strip_repeated_lines(text)
+    text = text.replace("\f", "\n")
+    text = HYPHEN_BREAK_RE.sub(r"\1\2", text)
+    text = SPACES_RE.sub(" ", text)
+    text = "\n".join(line.strip() for line in text.split("\n"))
+    text = BLANK_LINES_RE.sub("\n\n", text)
+    return text.strip()
+
+
+def _truncate(text, limit):
+    limit = max(0, limit)
+    if len(text) <= limit:
+        return text
+    # Cut at a line break where possible so no half lines reach the model
+    cut = text.rfind("\n", 0, limit)
+    return text[: cut if cut > limit // 2 else limit].rstrip()
+
+
+# Function to compact resume and job description and fit them into max_input_tokens.
+# build_prompt(resume, jd) returns the full prompt; count_tokens(prompt) is the SDK
+# counter and is only called when the estimate gets close to the budget.
+# Returns (prompt, report).
+def compact_prompt(resume_text, job_description, build_prompt, count_tokens=None, max_input_tokens=None):
+    if max_input_tokens is None:
+        max_input_tokens = int(os.getenv("PROMPT_MAX_INPUT_TOKENS", "8000"))
+
+    raw_prompt = build_prompt(resume_text, job_description)
+    resume = compact_text(resume_text)
+    jd = compact_text(job_description) if job_description else job_description
+    prompt = build_prompt(resume, jd)
+
+    report = {
+        "chars_before": len(raw_prompt),
+        "chars_after": len(prompt),
+        "tokens_before": estimate_tokens(raw_prompt),
+        "tokens_after": estimate_tokens(prompt),
+        "counted": False,
+        "truncated": False,
+    }
+
+    if count_tokens is not None and (
+        os.getenv("PROMPT_TOKEN_REPORT", "0") == "1" or report["tokens_after"] > 0.8 * max_input_tokens
+    ):
+        report["tokens_before"] = count_tokens(raw_prompt)
+        report["tokens_after"] = count_tokens(prompt)
+        report["counted"] = True
+
+    # Trim until the prompt fits; the job description keeps at most a third of the room
+    for _ in range(3):
+        if report["tokens_after"] <= max_input_tokens:
+            break
+        report["truncated"] = True
+        # Convert the budget to characters using this prompt's own ratio, with a small margin
+        chars_per_token = len(prompt) / max(report["tokens_after"], 1)
+        budget_chars = int(max_input_tokens * chars_per_token * 0.97)
+        fixed_chars = len(prompt) - len(resume) - len(jd or "")
+        room = max(0, budget_chars - fixed_chars)
+        if jd:
+            jd = _truncate(jd, min(len(jd), room // 3))
+        resume = _truncate(resume, room - len(jd or ""))
+        prompt = build_prompt(resume, jd)
+        report["tokens_after"] = count_tokens(prompt) if report["counted"] else estimate_tokens(prompt)
+
+    report["chars_after"] = len(prompt)
+    return prompt, report
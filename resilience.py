@@ -0,0 +1,303 @@
+import os
+import time
+import random
+import threading
+from contextlib import contextmanager
+
+# Client-side protection for Gemini calls, shared by every session in the process:
+#   - a token bucket caps the request rate,
+#   - a semaphore caps the number of calls in flight,
+#   - transient errors are retried with jittered exponential backoff,
+#   - a circuit breaker fails fast while the API keeps failing.
+# Everything takes plain callables and an injectable clock/sleep, so it can be
+# exercised against a local fake backend without network access.
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, retry_after):
+        super().__init__(f"Gemini is temporarily unavailable, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class RateLimitTimeout(Exception):
+    pass
+
+
+# Function to decide whether an error is worth retrying
+def is_transient_error(error):
+    try:
+        from google.api_core import exceptions as api_exceptions
+    except ImportError:
+        api_exceptions = None
+
+    if api_exceptions is not None and isinstance(error, (
+        api_exceptions.TooManyRequests,
+        api_exceptions.ResourceExhausted,
+        api_exceptions.ServiceUnavailable,
+        api_exceptions.DeadlineExceeded,
+        api_exceptions.InternalServerError,
+    )):
+        return True
+    return isinstance(error, (ConnectionError, TimeoutError))
+
+
+class TokenBucket:
+    def __init__(self, rate_per_second, capacity, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    # Block until a token is available; returns the time spent waiting
+    def acquire(self, timeout=None):
+        start = self.clock()
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return self.clock() - start
+                delay = (1 - self._tokens) / self.rate
+            if timeout is not None and self.clock() - start + delay > timeout:
+                raise RateLimitTimeout("Timed out waiting for the Gemini rate limiter")
+            self.sleep(delay)
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_started = 0.0
+        self._lock = threading.Lock()
+
+    # Raise CircuitOpenError while open; after reset_timeout let one trial call through.
+    # Returns True for the trial call, which must end in record_success, record_failure
+    # or release_trial.
+    def before_call(self):
+        with self._lock:
+            now = self.clock()
+            if self.state == "open":
+                elapsed = now - self._opened_at
+                if elapsed < self.reset_timeout:
+                    raise CircuitOpenError(self.reset_timeout - elapsed)
+            elif self.state == "half_open":
+                elapsed = now - self._trial_started
+                if elapsed < self.reset_timeout:
+                    raise CircuitOpenError(self.reset_timeout - elapsed)
+                # The trial never reported back; let another call try
+            else:
+                return False
+            self.state = "half_open"
+            self._trial_started = now
+            return True
+
+    # Function to give up the trial call without a verdict, e.g. when the caller
+    # stopped reading a stream; the next call becomes the trial
+    def release_trial(self):
+        with self._lock:
+            if self.state == "half_open":
+                self.state = "open"
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                self.state = "open"
+                self._opened_at = self.clock()
+
+
+class CallGuard:
+    def __init__(self, limiter, breaker, max_concurrency=4, max_retries=3,
+                 base_delay=1.0, max_delay=20.0, acquire_timeout=120.0,
+                 is_transient=is_transient_error, clock=time.monotonic, sleep=time.sleep):
+        self.limiter = limiter
+        self.breaker = breaker
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.acquire_timeout = acquire_timeout
+        self.is_transient = is_transient
+        self.clock = clock
+        self.sleep = sleep
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self.stats = {
+            "waiting": 0, "in_flight": 0, "calls": 0, "retries": 0,
+            "failures": 0, "rejected": 0, "total_wait_seconds": 0.0, "last_wait_seconds": 0.0,
+        }
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.stats[name] += amount
+
+    # Wait for a concurrency slot and a rate-limit token
+    @contextmanager
+    def _slot(self):
+        start = self.clock()
+        self._count("waiting")
+        try:
+            if not self._slots.acquire(timeout=self.acquire_timeout):
+                raise RateLimitTimeout("Timed out waiting for a free Gemini slot")
+            try:
+                self.limiter.acquire(timeout=self.acquire_timeout)
+            except Exception:
+                self._slots.release()
+                raise
+        finally:
+            waited = self.clock() - start
+            with self._lock:
+                self.stats["waiting"] -= 1
+                self.stats["total_wait_seconds"] += waited
+                self.stats["last_wait_seconds"] = waited
+        self._count("in_flight")
+        try:
+            yield
+        finally:
+            self._count("in_flight", -1)
+            self._slots.release()
+
+    def _backoff(self, attempt):
+        # Full jitter: sleep a random time up to the exponential cap
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    # Returns True when this attempt is the circuit breaker's trial call
+    def _before_attempt(self):
+        try:
+            return self.breaker.before_call()
+        except CircuitOpenError:
+            self._count("rejected")
+            raise
+
+    # Returns True when the call should be retried
+    def _after_failure(self, error, attempt):
+        if not self.is_transient(error):
+            # The API answered; the request itself was rejected
+            self.breaker.record_success()
+            self._count("failures")
+            return False
+        self.breaker.record_failure()
+        if attempt >= self.max_retries:
+            self._count("failures")
+            return False
+        self._count("retries")
+        self.sleep(self._backoff(attempt))
+        return True
+
+    # Run fn() under the limiter, retrying transient errors
+    def call(self, fn):
+        self._count("calls")
+        attempt = 0
+        while True:
+            trial = self._before_attempt()
+            try:
+                with self._slot():
+                    result = fn()
+            except (CircuitOpenError, RateLimitTimeout):
+                # Gemini was never called, so the breaker learns nothing
+                if trial:
+                    self.breaker.release_trial()
+                raise
+            except Exception as e:
+                if not self._after_failure(e, attempt):
+                    raise
+                attempt += 1
+                continue
+            except BaseException:
+                if trial:
+                    self.breaker.release_trial()
+                raise
+            self.breaker.record_success()
+            return result
+
+    # Run a streaming call. start() returns an iterable of chunks; attempts are
+    # retried only until the first chunk arrives, and the concurrency slot is
+    # held until the stream is exhausted.
+    def stream(self, start):
+        self._count("calls")
+        attempt = 0
+        while True:
+            trial = self._before_attempt()
+            delivered = False
+            try:
+                with self._slot():
+                    for chunk in start():
+                        delivered = True
+                        yield chunk
+            except (CircuitOpenError, RateLimitTimeout):
+                if trial:
+                    self.breaker.release_trial()
+                raise
+            except GeneratorExit:
+                # The consumer stopped reading (cancel or close). Chunks that arrived
+                # show the API is answering; otherwise the attempt has no verdict.
+                if delivered:
+                    self.breaker.record_success()
+                elif trial:
+                    self.breaker.release_trial()
+                raise
+            except Exception as e:
+                if delivered:
+                    # Part of the answer is already on screen, so never retry
+                    if self.is_transient(e):
+                        self.breaker.record_failure()
+                    else:
+                        self.breaker.record_success()
+                    self._count("failures")
+                    raise
+                if not self._after_failure(e, attempt):
+                    raise
+                attempt += 1
+                continue
+            except BaseException:
+                if trial:
+                    self.breaker.release_trial()
+                raise
+            self.breaker.record_success()
+            return
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats["circuit"] = self.breaker.state
+        calls = stats["calls"] or 1
+        stats["avg_wait_seconds"] = round(stats["total_wait_seconds"] / calls, 3)
+        return stats
+
+
+_guard = None
+_guard_lock = threading.Lock()
+
+
+# Process-wide guard for all Gemini calls
+def get_gemini_guard():
+    global _guard
+    with _guard_lock:
+        if _guard is None:
+            rate_per_minute = float(os.getenv("GEMINI_RATE_PER_MINUTE", "60"))
+            _guard = CallGuard(
+                TokenBucket(rate_per_minute / 60, float(os.getenv("GEMINI_BURST", "5"))),
+                CircuitBreaker(
+                    failure_threshold=int(os.getenv("GEMINI_BREAKER_FAILURES", "5")),
+                    reset_timeout=float(os.getenv("GEMINI_BREAKER_RESET_SECONDS", "30")),
+                ),
+                max_concurrency=int(os.getenv("GEMINI_MAX_CONCURRENCY", "4")),
+                max_retries=int(os.getenv("GEMINI_MAX_RETRIES", "3")),
+            )
+        return _guard
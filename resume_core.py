@@ -0,0 +1,434 @@
+import os
+import re
+import json
+import time
+from functools import lru_cache
+from dotenv import load_dotenv
+from extraction_cache import get_extraction_cache
+from extraction_engines import extract_text_layer
+from extraction_guard import extract_text_guarded, get_limits
+from ocr import count_pdf_pages, ocr_pages, rasterizable_path
+from llm_cache import get_llm_cache
+from gemini_client import get_model, default_model_name
+from resilience import get_gemini_guard
+from skill_matching import weighted_ats_score, resume_terms, weighted_score_from_terms
+from resume_sections import split_sections, diff_sections, resume_owner, get_version_store, MIN_SHARED_SECTIONS
+from prompt_compaction import compact_prompt
+from pipeline import submit_gemini
+from metrics import span, increment, observe
+
+# Core resume processing shared by the Streamlit app and the command line tools:
+# text extraction, ATS scoring and the Gemini critique.
+
+# Load environment variables
+load_dotenv()
+
+# Bump whenever build_analysis_prompt changes so cached critiques are regenerated
+PROMPT_VERSION = "3"
+
+# Bump whenever extract_text_from_pdf changes so cached text is re-extracted
+EXTRACTOR_VERSION = "7"
+
+# Pages whose text layer has fewer non-whitespace characters than this are OCR'd
+MIN_PAGE_TEXT_CHARS = int(os.getenv("MIN_PAGE_TEXT_CHARS", "50"))
+
+# Function to extract text from PDF.
+# Accepts a file path, raw bytes or a binary file-like object such as an upload buffer.
+# engine forces one text-layer engine (see extraction_engines); by default one is
+# picked per document. max_pages limits the pages read, pages in skip_ocr_pages are
+# never rasterized, and on_progress(text) receives the text found so far before OCR
+# starts and after every OCR'd page. extraction_guard runs this in a worker process
+# with time and memory budgets and keeps that text if the budget runs out.
+def extract_text_from_pdf(pdf_source, engine=None, max_pages=None, skip_ocr_pages=(), on_progress=None):
+    if isinstance(pdf_source, (str, os.PathLike)):
+        with open(pdf_source, "rb") as f:
+            pdf_source = f.read()
+    elif not isinstance(pdf_source, (bytes, bytearray, memoryview)):
+        pdf_source.seek(0)
+        pdf_source = pdf_source.read()
+    pdf_source = bytes(pdf_source)
+
+    # Try direct text extraction page by page
+    page_texts, page_sizes, _ = extract_text_layer(pdf_source, engine, max_pages)
+    skip_ocr_pages = set(skip_ocr_pages)
+
+    def page_done(number, page_text):
+        # Keep whichever version of the page carries more text
+        if len(page_text.strip()) > len(page_texts[number - 1].strip()):
+            page_texts[number - 1] = page_text
+        if on_progress is not None:
+            on_progress(merge_pages(page_texts))
+
+    if not page_texts:
+        # No engine could read the document at all, OCR every page
+        print("Direct text extraction failed, falling back to OCR for the whole PDF.")
+        increment("extraction_failures_total")
+        increment("ocr_fallbacks_total", scope="document")
+        try:
+            with rasterizable_path(pdf_source) as pdf_path, span("ocr") as fields:
+                page_count = count_pdf_pages(pdf_path)
+                if max_pages is not None:
+                    page_count = min(page_count, max_pages)
+                fields["pages"] = page_count
+                page_texts = [""] * page_count
+                page_numbers = [number for number in range(1, page_count + 1) if number not in skip_ocr_pages]
+                ocr_pages(pdf_path, page_numbers, on_page=page_done)
+        except Exception as e:
+            print(f"OCR failed: {e}")
+            return merge_pages(page_texts)
+    else:
+        # Only pages without a usable text layer go through OCR
+        sparse_pages = [
+            number for number, page_text in enumerate(page_texts, start=1)
+            if len("".join(page_text.split())) < MIN_PAGE_TEXT_CHARS and number not in skip_ocr_pages
+        ]
+        if sparse_pages:
+            if on_progress is not None:
+                on_progress(merge_pages(page_texts))
+            print(f"Falling back to OCR for pages {sparse_pages}.")
+            increment("ocr_fallbacks_total", len(sparse_pages), scope="page")
+            try:
+                with rasterizable_path(pdf_source) as pdf_path, span("ocr", pages=len(sparse_pages)):
+                    ocr_pages(pdf_path, sparse_pages, page_sizes=page_sizes, on_page=page_done)
+            except Exception as e:
+                print(f"OCR failed: {e}")
+
+    return merge_pages(page_texts)
+
+# Merge pages in order; form feeds mark page breaks for prompt compaction
+def merge_pages(page_texts):
+    return "\n\f".join(page_text.strip() for page_text in page_texts if page_text.strip())
+
+# Function to extract text through the shared content-addressed cache, within the
+# limits of extraction_guard. When notes is a list, messages about skipped pages or
+# exhausted budgets are appended to it.
+def extract_text_cached(pdf_bytes, notes=None):
+    limits = get_limits()
+    result = {}
+
+    def extract():
+        result.update(extract_text_guarded(pdf_bytes, limits))
+        return json.dumps({"text": result["text"], "notes": result["notes"]})
+
+    # The page limits decide which pages are read, so they are part of the key. Text
+    # cut short by the time or memory budget or by a crash is not cached.
+    version = f"{EXTRACTOR_VERSION}:{limits['max_pages']}:{limits['max_page_points']:g}"
+    with span("extract", bytes=len(pdf_bytes)):
+        cached = json.loads(get_extraction_cache().get_or_extract(
+            pdf_bytes, version, extract, keep=lambda value: result["outcome"] == "ok"
+        ))
+    if notes is not None:
+        notes.extend(cached["notes"])
+    return cached["text"]
+
+# Function to calculate ATS score
+def calculate_ats_score(resume_text, job_description):
+    if not resume_text or not job_description:
+        return 0
+
+    resume_words = set(re.findall(r'\b\w+\b', resume_text.lower()))
+    job_desc_words = set(re.findall(r'\b\w+\b', job_description.lower()))
+
+    matched_keywords = resume_words.intersection(job_desc_words)
+    ats_score = (len(matched_keywords) / len(job_desc_words)) * 100 if job_desc_words else 0
+
+    return round(ats_score, 2)
+
+# Function to score a resume in the chosen mode.
+# "keyword" is calculate_ats_score; "weighted" uses IDF-weighted terms and dictionary skills.
+# Returns {"score": percent, "matched": [...], "missing": [...]}.
+def score_resume(resume_text, job_description, mode="keyword"):
+    with span("ats_score", mode=mode):
+        if mode == "weighted":
+            return weighted_ats_score(resume_text, job_description)
+        return {"score": calculate_ats_score(resume_text, job_description), "matched": [], "missing": []}
+
+# Terms of one resume section, cached so unchanged sections of a revised resume are not re-tokenized
+@lru_cache(maxsize=4096)
+def _section_terms(section_text, mode):
+    if mode == "weighted":
+        return frozenset(resume_terms(section_text))
+    return frozenset(re.findall(r'\b\w+\b', section_text.lower()))
+
+# Function to score a resume from its sections (see resume_sections.split_sections).
+# Gives the same score as score_resume in keyword mode.
+def score_resume_sections(sections, job_description, mode="keyword"):
+    with span("ats_score", mode=mode, sections=len(sections)):
+        if not sections or not job_description:
+            return {"score": 0, "matched": [], "missing": []}
+        terms = frozenset().union(*(_section_terms(section["text"], mode) for section in sections))
+        if mode == "weighted":
+            return weighted_score_from_terms(terms, job_description)
+        job_desc_words = set(re.findall(r'\b\w+\b', job_description.lower()))
+        ats_score = (len(terms & job_desc_words) / len(job_desc_words)) * 100 if job_desc_words else 0
+        return {"score": round(ats_score, 2), "matched": [], "missing": []}
+
+# Critique instructions sent to Gemini AI, kept free of indentation to save input tokens
+ANALYSIS_PREAMBLE = "Act as an expert Resume Critique Bot with extensive experience in professional resume writing and HR."
+
+# The critique sections. uses_jd marks sections that depend on the job description.
+ANALYSIS_SECTIONS = [
+    {"id": "overall", "title": "Overall Impression", "uses_jd": False, "instructions": """1. OVERALL IMPRESSION:
+- Provide a brief overview of the resume's effectiveness
+- Comment on the resume's organization and clarity
+"""},
+    {"id": "content", "title": "Content Analysis", "uses_jd": False, "instructions": """2. CONTENT ANALYSIS:
+- Professional Experience
+- Education
+- Skills and Competencies
+- Achievements and Impact
+- Technical Proficiency
+"""},
+    {"id": "formatting", "title": "Formatting and Presentation", "uses_jd": False, "instructions": """3. FORMATTING AND PRESENTATION:
+- Layout and Design
+- Use of Action Verbs
+- Consistency
+- Professional Tone
+"""},
+    {"id": "recommendations", "title": "Specific Recommendations", "uses_jd": False, "instructions": """4. SPECIFIC RECOMMENDATIONS:
+- List 3-5 concrete improvements
+- Suggest better ways to phrase key experiences
+- Recommend additional sections if needed
+"""},
+    {"id": "industry", "title": "Industry Alignment", "uses_jd": False, "instructions": """5. INDUSTRY ALIGNMENT:
+- Evaluate market readiness
+- Suggest industry-specific optimizations
+"""},
+    {"id": "skills", "title": "Skill Enhancement", "uses_jd": False, "instructions": """6. SKILL ENHANCEMENT:
+- Recommend relevant certifications
+- Suggest courses for skill development
+- Identify trending skills in the field
+"""},
+    {"id": "job_match", "title": "Job Match Analysis", "uses_jd": True, "instructions": """7. JOB MATCH ANALYSIS:
+- Compare resume against job requirements
+- Identify missing key qualifications
+- Suggest tailoring strategies
+"""},
+]
+SECTIONS_BY_ID = {section["id"]: section for section in ANALYSIS_SECTIONS}
+
+ANALYSIS_INSTRUCTIONS = (
+    f"{ANALYSIS_PREAMBLE} Analyze the provided resume and provide detailed feedback in the following structured format:\n\n"
+    + "\n".join(section["instructions"] for section in ANALYSIS_SECTIONS if not section["uses_jd"])
+)
+
+JOB_MATCH_INSTRUCTIONS = SECTIONS_BY_ID["job_match"]["instructions"]
+
+# Function to build the critique prompt for Gemini AI
+def build_analysis_prompt(resume_text, job_description=None):
+    base_prompt = f"{ANALYSIS_INSTRUCTIONS}\nResume:\n{resume_text}\n"
+
+    if job_description:
+        base_prompt += f"\n{JOB_MATCH_INSTRUCTIONS}\nJob Description:\n{job_description}\n"
+
+    return base_prompt
+
+# Function to add Gemini's token counts to a span's fields and the token counters
+def record_usage(fields, response):
+    usage = getattr(response, "usage_metadata", None)
+    if not usage:
+        return
+    fields["prompt_tokens"] = usage.prompt_token_count
+    fields["output_tokens"] = usage.candidates_token_count
+    increment("gemini_tokens_total", usage.prompt_token_count or 0, kind="prompt")
+    increment("gemini_tokens_total", usage.candidates_token_count or 0, kind="output")
+
+# Function to compact the inputs and fit the prompt into the token budget.
+# Returns (prompt, report) where report has the token counts before and after.
+def prepare_analysis_prompt(resume_text, job_description=None, model_name=None):
+    model = get_model(model_name)
+
+    def count_tokens(prompt):
+        return get_gemini_guard().call(lambda: model.count_tokens(prompt)).total_tokens
+
+    return compact_prompt(resume_text, job_description, build_analysis_prompt, count_tokens)
+
+# Function to build the cache key for a critique
+def analysis_cache_key(resume_text, job_description=None, model_name=None):
+    model_name = model_name or default_model_name()
+    return get_llm_cache().make_key(resume_text, job_description, PROMPT_VERSION, model_name)
+
+# model_name picks a different Gemini model for this call (defaults to GEMINI_MODEL)
+def analyze_resume(resume_text, job_description=None, model_name=None, on_report=None):
+    if not resume_text:
+        return {"error": "Resume text is required for analysis."}
+
+    def generate():
+        model = get_model(model_name)
+        prompt, report = prepare_analysis_prompt(resume_text, job_description, model_name)
+        if on_report:
+            on_report(report)
+        # Rate limited, retried on transient errors and short-circuited while Gemini is down
+        with span("gemini", model=model.model_name) as fields:
+            response = get_gemini_guard().call(lambda: model.generate_content(prompt))
+            record_usage(fields, response)
+        return response.text.strip()
+
+    return get_llm_cache().get_or_compute(analysis_cache_key(resume_text, job_description, model_name), generate)
+
+# Function to stream the analysis from Gemini as it is generated
+# on_report, if given, receives the prompt size report before generation starts
+def stream_resume_analysis(resume_text, job_description=None, model_name=None, on_report=None):
+    if not resume_text:
+        raise ValueError("Resume text is required for analysis.")
+
+    model = get_model(model_name)
+    prompt, report = prepare_analysis_prompt(resume_text, job_description, model_name)
+    if on_report:
+        on_report(report)
+    with span("gemini", model=model.model_name, stream=True) as fields:
+        start = time.perf_counter()
+        response = get_gemini_guard().stream(lambda: model.generate_content(prompt, stream=True))
+        last_chunk = None
+        for chunk in response:
+            if last_chunk is None:
+                first_token_seconds = time.perf_counter() - start
+                fields["first_token_seconds"] = round(first_token_seconds, 4)
+                observe("stage_seconds", first_token_seconds, stage="gemini_first_token")
+            last_chunk = chunk
+            # Chunks without parts (e.g. a trailing safety/finish chunk) carry no text
+            if chunk.parts:
+                yield chunk.text
+        # Token usage for the whole response arrives with the last chunk
+        record_usage(fields, last_chunk)
+
+# Function to build the prompt for one critique section
+def build_section_prompt(section_id, resume_text, job_description=None):
+    section = SECTIONS_BY_ID[section_id]
+    prompt = (
+        f"{ANALYSIS_PREAMBLE} Analyze the provided resume and write only the following section "
+        f"of a structured critique, starting with its heading:\n\n{section['instructions']}\nResume:\n{resume_text}\n"
+    )
+    if section["uses_jd"]:
+        prompt += f"\nJob Description:\n{job_description}\n"
+    return prompt
+
+# Sections that do not use the job description are cached without it,
+# so editing the JD only regenerates the JD-dependent sections
+def section_cache_key(section_id, resume_text, job_description=None, model_name=None):
+    model_name = model_name or default_model_name()
+    job_description = job_description if SECTIONS_BY_ID[section_id]["uses_jd"] else ""
+    return get_llm_cache().make_key(resume_text, job_description, PROMPT_VERSION, model_name, "section", section_id)
+
+# Function to generate (or fetch from cache) one critique section
+def analyze_section(section_id, resume_text, job_description=None, model_name=None):
+    def generate():
+        model = get_model(model_name)
+        prompt, _ = compact_prompt(
+            resume_text, job_description,
+            lambda resume, jd: build_section_prompt(section_id, resume, jd),
+        )
+        with span("gemini", model=model.model_name, section=section_id) as fields:
+            response = get_gemini_guard().call(lambda: model.generate_content(prompt))
+            record_usage(fields, response)
+        return response.text.strip()
+
+    return get_llm_cache().get_or_compute(
+        section_cache_key(section_id, resume_text, job_description, model_name), generate
+    )
+
+# Function to request several sections in parallel.
+# Returns {section_id: future} in the canonical section order; the job match
+# section is skipped when there is no job description.
+def start_section_analysis(resume_text, job_description=None, section_ids=None, model_name=None):
+    if not resume_text:
+        raise ValueError("Resume text is required for analysis.")
+    wanted = set(section_ids or SECTIONS_BY_ID)
+    futures = {}
+    for section in ANALYSIS_SECTIONS:
+        if section["id"] not in wanted or (section["uses_jd"] and not job_description):
+            continue
+        futures[section["id"]] = submit_gemini(analyze_section, section["id"], resume_text, job_description, model_name)
+    return futures
+
+# Function to run a sectioned analysis and join the sections in order
+def analyze_resume_sections(resume_text, job_description=None, section_ids=None, model_name=None):
+    futures = start_section_analysis(resume_text, job_description, section_ids, model_name)
+    return "\n\n".join(future.result() for future in futures.values())
+
+# Function run on the pipeline pool: emits streamed chunks and returns the final critique
+def produce_analysis(emit, resume_text, job_description=None, model_name=None, stream=True, on_report=None):
+    if not stream:
+        return analyze_resume(resume_text, job_description, model_name, on_report)
+
+    def stream_chunks():
+        chunks = []
+        for chunk in stream_resume_analysis(resume_text, job_description, model_name, on_report):
+            chunks.append(chunk)
+            emit(chunk)
+        return "".join(chunks).strip()
+
+    # Cached critiques come back whole; misses stream in and are stored
+    return get_llm_cache().get_or_compute(
+        analysis_cache_key(resume_text, job_description, model_name), stream_chunks
+    )
+
+# Function to build the critique prompt for one section of the resume itself
+def build_resume_section_prompt(title, section_text, job_description=None):
+    prompt = (
+        f"{ANALYSIS_PREAMBLE} Critique the \"{title}\" section of a resume below. Point out weaknesses and "
+        f"suggest concrete rewrites, keeping the feedback to this section only.\n\nSection:\n{section_text}\n"
+    )
+    if job_description:
+        prompt += f"\nRelate the feedback to this job description:\n{job_description}\n"
+    return prompt
+
+# Keyed by the section's own text, so it stays valid when other sections change
+def resume_section_cache_key(section, job_description=None, model_name=None):
+    model_name = model_name or default_model_name()
+    return get_llm_cache().make_key(
+        section["text"], job_description, PROMPT_VERSION, model_name, "resume_section", section["title"]
+    )
+
+# Function to critique (or fetch from cache) one resume section
+def critique_resume_section(section, job_description=None, model_name=None):
+    def generate():
+        model = get_model(model_name)
+        prompt, _ = compact_prompt(
+            section["text"], job_description,
+            lambda text, jd: build_resume_section_prompt(section["title"], text, jd),
+        )
+        with span("gemini", model=model.model_name, resume_section=section["key"]) as fields:
+            response = get_gemini_guard().call(lambda: model.generate_content(prompt))
+            record_usage(fields, response)
+        return response.text.strip()
+
+    return get_llm_cache().get_or_compute(resume_section_cache_key(section, job_description, model_name), generate)
+
+# Function to start an incremental analysis of a possibly revised resume.
+# previous_sections are the sections of the last version seen in this session; when
+# they share too little with this upload, the most similar version stored for owner
+# is used. owner defaults to the resume's contact details (see resume_owner); a
+# resume without them is not looked up or stored.
+# Returns (sections, diff, {section_key: future}); diff is None for a first version, its
+# "source" says whether it was computed against the session or the store, and "cached"
+# lists the unchanged sections whose critique for this job description is cached.
+# Every section is requested, but cached ones are answered from the LLM cache.
+def start_incremental_analysis(resume_text, job_description=None, model_name=None, previous_sections=None,
+                               owner=None):
+    if not resume_text:
+        raise ValueError("Resume text is required for analysis.")
+    sections = split_sections(resume_text)
+    owner = owner or resume_owner(sections)
+    store = get_version_store() if owner is not None else None
+
+    diff = dict(diff_sections(previous_sections, sections), source="session") if previous_sections else None
+    if store is not None and (diff is None or diff["reused_ratio"] < MIN_SHARED_SECTIONS):
+        previous = store.find_previous(sections, owner)
+        if previous:
+            diff = dict(diff_sections(previous, sections), source="store")
+    if store is not None:
+        store.add(sections, owner)
+    if diff is not None:
+        # Unchanged text is only reused when the job description and model are the same too
+        unchanged = {section["key"]: section for section in sections if section["key"] in diff["unchanged"]}
+        diff["cached"] = [
+            key for key, section in unchanged.items()
+            if get_llm_cache().contains(resume_section_cache_key(section, job_description, model_name))
+        ]
+
+    futures = {
+        section["key"]: submit_gemini(critique_resume_section, section, job_description, model_name)
+        for section in sections
+    }
+    return sections, diff, futures
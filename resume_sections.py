@@ -0,0 +1,224 @@
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+from contextlib import contextmanager
+
+# Resume sections and version diffs.
+#
+# Extracted text is split at recognised headings (experience, education,
+# skills, ...) and every section is fingerprinted by its whitespace-normalized
+# text. When a candidate uploads a revised resume, comparing fingerprints
+# with the previous version shows which sections changed, so only those are
+# re-scored and re-critiqued; results for the others come from cache.
+#
+# Previous versions are looked up in the session first and then in a small
+# SQLite store (RESUME_VERSIONS_PATH) that keeps only section keys and
+# fingerprints, never resume text. Stored versions belong to an owner and are
+# only compared with that owner's uploads, so a diff never shows another
+# candidate's resume. By default the owner is the fingerprint of the contact
+# details above the first heading, which stay the same across revisions of
+# one candidate's resume. The most similar stored version is found through
+# the fingerprints the two versions share.
+
+SECTION_HEADINGS = {
+    "summary": ("summary", "professional summary", "profile", "professional profile", "objective",
+                "career objective", "about me"),
+    "experience": ("experience", "work experience", "professional experience", "employment",
+                   "employment history", "work history", "career history", "relevant experience"),
+    "education": ("education", "academic background", "education and training", "qualifications"),
+    "skills": ("skills", "technical skills", "key skills", "core competencies", "competencies",
+               "technologies", "skills and abilities"),
+    "projects": ("projects", "personal projects", "key projects", "academic projects"),
+    "certifications": ("certifications", "certificates", "licenses and certifications", "courses",
+                       "training"),
+    "awards": ("awards", "honors", "achievements", "awards and honors", "honors and awards"),
+    "publications": ("publications", "research"),
+    "languages": ("languages",),
+    "volunteer": ("volunteer", "volunteering", "volunteer experience"),
+    "interests": ("interests", "hobbies", "hobbies and interests"),
+}
+HEADING_ALIASES = {alias: key for key, aliases in SECTION_HEADINGS.items() for alias in aliases}
+# Last words of the headings above, e.g. "projects" in "Side Projects:"
+HEADING_WORDS = frozenset(alias.split()[-1] for aliases in SECTION_HEADINGS.values() for alias in aliases) - {"me"}
+
+# Text before the first heading: name and contact details
+HEADER_KEY = "contact"
+
+# Share of sections a previous version must have in common to count as the same resume
+MIN_SHARED_SECTIONS = float(os.getenv("RESUME_DIFF_MIN_SHARED", "0.5"))
+
+
+def fingerprint(text):
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+# Function to recognise a heading line; returns (key, title) or None
+def heading_of(line):
+    stripped = line.strip().strip("\f")
+    if not stripped or len(stripped) > 40:
+        return None
+    normalized = " ".join(re.sub(r"[^a-z ]", " ", stripped.lower().replace("&", " and ")).split())
+    if normalized in HEADING_ALIASES:
+        return HEADING_ALIASES[normalized], stripped.rstrip(":").strip()
+    # Other short lines ending in a colon start their own section when they are in
+    # capitals ("OPEN SOURCE:") or end in a heading word ("Side Projects:"), so labels
+    # such as "Tools:" inside a job entry stay part of it
+    words = normalized.split()
+    if stripped.endswith(":") and 0 < len(words) <= 4 and (stripped.isupper() or words[-1] in HEADING_WORDS):
+        return normalized.replace(" ", "_"), stripped.rstrip(":").strip()
+    return None
+
+
+# Function to split resume text into sections.
+# Returns [{"key", "title", "text", "fingerprint"}] in document order; joining the
+# texts with newlines gives back the original text.
+def split_sections(text):
+    sections = []
+    current = {"key": HEADER_KEY, "title": "Contact details", "lines": []}
+    for line in (text or "").split("\n"):
+        heading = heading_of(line)
+        if heading is not None:
+            sections.append(current)
+            current = {"key": heading[0], "title": heading[1], "lines": []}
+        current["lines"].append(line)
+    sections.append(current)
+
+    result = []
+    seen = {}
+    for section in sections:
+        section_text = "\n".join(section["lines"])
+        if not section_text.strip():
+            continue
+        # Repeated headings (two "Experience" blocks) get distinct keys
+        seen[section["key"]] = seen.get(section["key"], 0) + 1
+        key = section["key"] if seen[section["key"]] == 1 else f"{section['key']}-{seen[section['key']]}"
+        result.append({"key": key, "title": section["title"], "text": section_text,
+                       "fingerprint": fingerprint(section_text)})
+    return result
+
+
+# Function to compare two versions by section key.
+# previous may be a list of sections or a {key: fingerprint} mapping (as stored).
+def diff_sections(previous, current):
+    if isinstance(previous, list):
+        previous = {section["key"]: section["fingerprint"] for section in previous}
+    diff = {"unchanged": [], "changed": [], "added": [], "removed": []}
+    for section in current:
+        old = previous.get(section["key"])
+        if old is None:
+            diff["added"].append(section["key"])
+        elif old == section["fingerprint"]:
+            diff["unchanged"].append(section["key"])
+        else:
+            diff["changed"].append(section["key"])
+    current_keys = {section["key"] for section in current}
+    diff["removed"] = [key for key in previous if key not in current_keys]
+    diff["reused_ratio"] = round(len(diff["unchanged"]) / len(current), 3) if current else 0.0
+    return diff
+
+
+# Function to identify whose resume this is: the fingerprint of the contact details
+# before the first heading. Returns None when the resume has none.
+def resume_owner(sections):
+    for section in sections:
+        if section["key"] == HEADER_KEY:
+            return section["fingerprint"]
+    return None
+
+
+class ResumeVersionStore:
+    def __init__(self, path, max_versions=10000):
+        self.path = path
+        self.max_versions = max_versions
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(versions)")]
+            if columns and "owner" not in columns:
+                # Versions stored before they had an owner cannot be matched safely
+                conn.executescript("DROP TABLE versions; DROP TABLE IF EXISTS sections;")
+            conn.executescript(
+                "CREATE TABLE IF NOT EXISTS versions ("
+                " version_id INTEGER PRIMARY KEY AUTOINCREMENT, owner TEXT NOT NULL,"
+                " resume_fingerprint TEXT NOT NULL, section_count INTEGER NOT NULL, created_at REAL NOT NULL,"
+                " UNIQUE (owner, resume_fingerprint));"
+                "CREATE TABLE IF NOT EXISTS sections ("
+                " version_id INTEGER NOT NULL, key TEXT NOT NULL, fingerprint TEXT NOT NULL,"
+                " PRIMARY KEY (version_id, key)) WITHOUT ROWID;"
+                "CREATE INDEX IF NOT EXISTS sections_fingerprint ON sections (fingerprint);"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _resume_fingerprint(sections):
+        return hashlib.sha256("\0".join(section["fingerprint"] for section in sections).encode("ascii")).hexdigest()
+
+    # Function to find the owner's stored version sharing the most sections with this one.
+    # Returns {key: fingerprint} of that version, or None when fewer than
+    # min_shared of the sections match.
+    def find_previous(self, sections, owner, min_shared=MIN_SHARED_SECTIONS):
+        if not sections:
+            return None
+        fingerprints = [section["fingerprint"] for section in sections]
+        placeholders = ",".join("?" * len(fingerprints))
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT sections.version_id, COUNT(*) AS shared FROM sections"
+                " JOIN versions ON versions.version_id = sections.version_id"
+                f" WHERE versions.owner = ? AND sections.fingerprint IN ({placeholders})"
+                " GROUP BY sections.version_id ORDER BY shared DESC, sections.version_id DESC LIMIT 1",
+                [owner, *fingerprints],
+            ).fetchone()
+            if row is None or row[1] / len(sections) < min_shared:
+                return None
+            return dict(conn.execute("SELECT key, fingerprint FROM sections WHERE version_id = ?", (row[0],)))
+
+    # Function to remember an owner's version; identical versions are stored once per owner
+    def add(self, sections, owner):
+        if not sections:
+            return
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO versions (owner, resume_fingerprint, section_count, created_at)"
+                " VALUES (?, ?, ?, ?)",
+                (owner, self._resume_fingerprint(sections), len(sections), time.time()),
+            )
+            if not cursor.rowcount:
+                return
+            conn.executemany(
+                "INSERT OR REPLACE INTO sections (version_id, key, fingerprint) VALUES (?, ?, ?)",
+                ((cursor.lastrowid, section["key"], section["fingerprint"]) for section in sections),
+            )
+            # Keep the store bounded: drop the oldest versions
+            stale = "SELECT version_id FROM versions ORDER BY version_id DESC LIMIT -1 OFFSET ?"
+            conn.execute(f"DELETE FROM sections WHERE version_id IN ({stale})", (self.max_versions,))
+            conn.execute(f"DELETE FROM versions WHERE version_id IN ({stale})", (self.max_versions,))
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+# Process-wide version store shared by every session
+def get_version_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ResumeVersionStore(
+                os.getenv("RESUME_VERSIONS_PATH", os.path.join(".cache", "resume_versions.sqlite3")),
+                max_versions=int(os.getenv("RESUME_VERSIONS_MAX", "10000")),
+            )
+        return _store
@@ -0,0 +1,202 @@
+import os
+import re
+import math
+from collections import deque
+from functools import lru_cache
+
+# Weighted, phrase-aware ATS scoring.
+#
+# The job description is reduced to the terms that matter: skills from a
+# configurable dictionary (multi-word ones such as "machine learning" or
+# "ci/cd" included) plus the remaining words after stopword removal and light
+# stemming. Each term is weighted by its IDF in a local corpus, so rare words
+# like "kubernetes" count for more than common ones. Skills are found with an
+# Aho-Corasick automaton that is built once per process, so matching stays
+# linear in the text length however large the dictionary is.
+
+DEFAULT_SKILLS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "skills.txt")
+
+# Extra weight for dictionary skills on top of their IDF
+SKILL_BOOST = 2.0
+
+STOPWORDS = frozenset("""
+a about above across after again against all also am an and any are as at be because been before
+being below between both but by can could did do does doing down during each either etc few for from
+further get had has have having he her here hers him his how i if in into is it its itself just may
+me might more most must my no nor not now of off on once only or other our ours out over own per
+please plus same shall she should so some such than that the their theirs them then there these
+they this those through to too under until up upon us very via was we well were what when where
+which while who whom why will with within without would you your yours
+ability able candidate candidates experience experienced including job knowledge looking preferred
+need needs required requirements responsibilities role seeking skills strong team want work working years year
+""".split())
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*")
+
+
+# Function to strip common English suffixes so "developing" and "developed" match
+@lru_cache(maxsize=65536)
+def stem(word):
+    if len(word) <= 4 or not word.isalpha():
+        return word
+    for suffix in ("ations", "ation", "ments", "ment", "ings", "ing", "ies", "ers", "er", "ed", "es", "ly", "s"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[: -len(suffix)]
+            if suffix == "ies":
+                word += "y"
+            break
+    return word
+
+
+def normalize(text):
+    return " ".join((text or "").lower().split())
+
+
+def content_terms(text):
+    return {stem(token) for token in TOKEN_RE.findall(normalize(text)) if token not in STOPWORDS}
+
+
+class AhoCorasick:
+    def __init__(self, patterns):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        for pattern in patterns:
+            self._add(pattern)
+        self._build_failure_links()
+
+    def _add(self, pattern):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append(pattern)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                if self._fail[next_state] == next_state:
+                    self._fail[next_state] = 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    # Yield (start, end, pattern) for every occurrence in text
+    def iter_matches(self, text):
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for pattern in self._output[state]:
+                yield index - len(pattern) + 1, index + 1, pattern
+
+
+class SkillMatcher:
+    def __init__(self, skills):
+        self.skills = sorted({normalize(skill) for skill in skills if skill.strip()})
+        self._automaton = AhoCorasick(self.skills)
+
+    # Function to find dictionary skills that appear as whole words in text
+    def find(self, text):
+        text = normalize(text)
+        found = set()
+        for start, end, skill in self._automaton.iter_matches(text):
+            before = text[start - 1] if start > 0 else " "
+            after = text[end] if end < len(text) else " "
+            if not before.isalnum() and not (after.isalnum() or after in "+#"):
+                found.add(skill)
+        return found
+
+
+def load_skills(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+# Built once per process for each dictionary file
+@lru_cache(maxsize=4)
+def get_skill_matcher(path=None):
+    return SkillMatcher(load_skills(path or os.getenv("SKILLS_DICTIONARY", DEFAULT_SKILLS_PATH)))
+
+
+# Function to compute IDF weights from an iterable of documents
+def build_idf(documents):
+    document_count = 0
+    frequencies = {}
+    matcher = get_skill_matcher()
+    for text in documents:
+        document_count += 1
+        for term in content_terms(text) | matcher.find(text):
+            frequencies[term] = frequencies.get(term, 0) + 1
+    return {
+        term: math.log((1 + document_count) / (1 + frequency)) + 1
+        for term, frequency in frequencies.items()
+    }, document_count
+
+
+# IDF from the .txt files in IDF_CORPUS_DIR (e.g. past job postings); empty when unset
+@lru_cache(maxsize=1)
+def get_idf_weights():
+    corpus_dir = os.getenv("IDF_CORPUS_DIR")
+    if not corpus_dir or not os.path.isdir(corpus_dir):
+        return {}, 0
+
+    def documents():
+        for name in sorted(os.listdir(corpus_dir)):
+            if name.endswith(".txt"):
+                with open(os.path.join(corpus_dir, name), "r", encoding="utf-8", errors="ignore") as f:
+                    yield f.read()
+
+    return build_idf(documents())
+
+
+# Function to collect the skills and content words a resume (or part of one) contains
+def resume_terms(resume_text):
+    return get_skill_matcher().find(resume_text) | content_terms(resume_text)
+
+
+# Function to score a resume against a job description with weighted terms.
+# Returns {"score": percent, "matched": [...], "missing": [...]}, heaviest terms first.
+def weighted_ats_score(resume_text, job_description):
+    if not resume_text or not job_description:
+        return {"score": 0, "matched": [], "missing": []}
+    return weighted_score_from_terms(resume_terms(resume_text), job_description)
+
+
+# Function to score precomputed resume terms, e.g. the union of per-section terms
+def weighted_score_from_terms(terms, job_description):
+    if not job_description:
+        return {"score": 0, "matched": [], "missing": []}
+
+    matcher = get_skill_matcher()
+    idf, document_count = get_idf_weights()
+    # Terms never seen in the corpus are as rare as possible
+    default_idf = math.log(1 + document_count) + 1
+
+    jd_skills = matcher.find(job_description)
+    skill_words = {stem(word) for skill in jd_skills for word in TOKEN_RE.findall(skill)}
+    jd_words = content_terms(job_description) - skill_words
+
+    weights = {skill: SKILL_BOOST * idf.get(skill, default_idf) for skill in jd_skills}
+    weights.update({word: idf.get(word, default_idf) for word in jd_words})
+    if not weights:
+        return {"score": 0, "matched": [], "missing": []}
+
+    ranked = sorted(weights, key=lambda term: (-weights[term], term))
+    matched = [term for term in ranked if term in terms]
+    missing = [term for term in ranked if term not in terms]
+
+    score = sum(weights[term] for term in matched) / sum(weights.values()) * 100
+    return {"score": round(score, 2), "matched": matched, "missing": missing}
@@ -0,0 +1,55 @@
+import base64
+import json
+
+import pytest
+
+from api_server import parse_submission
+from job_queue import JobQueue
+
+PDF = b"%PDF-1.4 resume"
+
+
+def submission(**fields):
+    return json.dumps({"resume_base64": base64.b64encode(PDF).decode("ascii"), **fields})
+
+
+def test_sections_are_validated():
+    _, _, options = parse_submission(submission(sections=["overall", "overall"]))
+    assert options["sections"] == ["overall"]
+
+    for sections in ("overall", ["no_such_section"], [1, 2]):
+        with pytest.raises(ValueError):
+            parse_submission(submission(sections=sections))
+
+
+def test_job_that_keeps_crashing_is_failed(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    job_id, _ = JobQueue(path, max_attempts=2).submit(PDF, "", {})
+
+    # Each restart finds the job still running and queues it again
+    for _ in range(2):
+        queue = JobQueue(path, max_attempts=2)
+        assert queue.claim(timeout=0)["id"] == job_id
+
+    queue = JobQueue(path, max_attempts=2)
+    assert queue.claim(timeout=0) is None
+    job = queue.get(job_id)
+    assert job["status"] == "failed"
+    assert job["attempts"] == 2
+
+
+def test_model_must_be_configured(monkeypatch):
+    monkeypatch.setenv("GEMINI_MODELS", "gemini-1.5-flash,gemini-1.5-pro")
+    monkeypatch.setenv("GEMINI_MODEL", "gemini-1.5-flash")
+    _, _, options = parse_submission(submission(model="gemini-1.5-pro"))
+    assert options["model"] == "gemini-1.5-pro"
+
+    for model in ("gemini-ultra-expensive", ["gemini-1.5-pro"], 7):
+        with pytest.raises(ValueError):
+            parse_submission(submission(model=model))
+
+
+def test_job_description_must_be_a_string():
+    for job_description in (["python"], {"text": "python"}, 42):
+        with pytest.raises(ValueError):
+            parse_submission(submission(job_description=job_description))
@@ -0,0 +1,18 @@
+from ats_engine import ATSScorer
+from resume_core import calculate_ats_score
+
+JOB_DESCRIPTION = "Senior Python/Go engineer: SQL, AWS & Kubernetes. C++ a plus. Café_bar naïve 3D X_Y"
+
+
+def test_batch_scores_match_the_keyword_score():
+    resumes = [
+        "I know PYTHON, go and sql!",
+        "Kubernetes\tAWS\nsenior engineer, C++ and 3d",
+        "Café_bar with NAÏVE accents",
+        "x_y foo-bar",
+        "",
+    ]
+    scorer = ATSScorer(JOB_DESCRIPTION)
+    expected = [calculate_ats_score(text, JOB_DESCRIPTION) for text in resumes]
+    assert scorer.score_many(resumes) == expected
+    assert [scorer.score(text) for text in resumes] == expected
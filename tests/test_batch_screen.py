@@ -0,0 +1,26 @@
+import csv
+import json
+
+from batch_screen import finished_files
+
+
+def test_rows_with_an_error_are_not_finished(tmp_path):
+    path = tmp_path / "results.jsonl"
+    rows = [
+        {"file": "a.pdf", "ats_score": 71.0, "error": None},
+        {"file": "b.pdf", "ats_score": 40.0, "error": "critique failed: CircuitOpenError: paused"},
+        {"file": "c.pdf", "error": "PdfRejected: The file is not a PDF."},
+        {"file": "c.pdf", "ats_score": 55.0, "error": None},
+    ]
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows) + '{"file": "d.p', encoding="utf-8")
+    assert finished_files(str(path)) == {"a.pdf", "c.pdf"}
+
+
+def test_csv_rows_with_an_error_are_not_finished(tmp_path):
+    path = tmp_path / "results.csv"
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["file", "ats_score", "error"])
+        writer.writeheader()
+        writer.writerow({"file": "a.pdf", "ats_score": 71.0, "error": ""})
+        writer.writerow({"file": "b.pdf", "ats_score": "", "error": "critique failed"})
+    assert finished_files(str(path)) == {"a.pdf"}
@@ -0,0 +1,33 @@
+import threading
+import time
+
+from extraction_cache import ExtractionCache
+
+
+def test_single_flight_never_runs_two_extractions_of_one_document(tmp_path):
+    cache = ExtractionCache(str(tmp_path))
+    running = []
+    overlaps = []
+
+    def extract():
+        running.append(1)
+        if len(running) > 1:
+            overlaps.append(len(running))
+        time.sleep(0.01)
+        running.pop()
+        return "text"
+
+    # Results that are not kept force every thread to extract again, one after another
+    def worker():
+        cache.get_or_extract(b"%PDF-1.4", "1", extract, keep=lambda text: False)
+
+    threads = [threading.Thread(target=worker) for _ in range(12)]
+    for index, thread in enumerate(threads):
+        thread.start()
+        if index % 3 == 2:
+            time.sleep(0.015)
+    for thread in threads:
+        thread.join()
+
+    assert overlaps == []
+    assert cache._extracting == {}
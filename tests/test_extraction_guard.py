@@ -0,0 +1,67 @@
+import multiprocessing
+import os
+import time
+
+import resume_core
+from extraction_cache import ExtractionCache
+from extraction_guard import _group_memory_mb, _kill_worker
+
+
+def test_worker_is_killed_before_it_has_its_own_process_group():
+    # The worker never calls setpgrp, as when it is killed right after starting
+    process = multiprocessing.get_context("spawn").Process(target=time.sleep, args=(60,))
+    process.start()
+    _kill_worker(process)
+    assert not process.is_alive()
+
+
+def test_group_memory_counts_every_process_in_the_group():
+    # A spawned child stays in this process's group, so the group holds more than this process alone
+    own = _group_memory_mb(os.getpgrp())
+    process = multiprocessing.get_context("spawn").Process(target=time.sleep, args=(60,))
+    process.start()
+    try:
+        time.sleep(0.5)
+        assert _group_memory_mb(os.getpgrp()) > own
+    finally:
+        process.kill()
+        process.join()
+
+
+def fake_guard(outcome, notes, calls):
+    def extract_text_guarded(pdf_bytes, limits=None):
+        calls.append(pdf_bytes)
+        return {"text": "resume text", "complete": outcome == "ok" and not notes, "outcome": outcome,
+                "pages": 30, "pages_read": 20, "notes": list(notes)}
+    return extract_text_guarded
+
+
+def test_page_capped_text_is_cached_with_its_notes(tmp_path, monkeypatch):
+    calls = []
+    cache = ExtractionCache(str(tmp_path))
+    monkeypatch.setattr(resume_core, "get_extraction_cache", lambda: cache)
+    monkeypatch.setattr(resume_core, "extract_text_guarded",
+                        fake_guard("ok", ["Only the first 20 of 30 pages were read."], calls))
+
+    for _ in range(2):
+        notes = []
+        assert resume_core.extract_text_cached(b"%PDF-1.4 capped", notes) == "resume text"
+        assert notes == ["Only the first 20 of 30 pages were read."]
+    assert len(calls) == 1
+
+    # A different page limit reads different pages
+    monkeypatch.setenv("EXTRACTION_MAX_PAGES", "40")
+    resume_core.extract_text_cached(b"%PDF-1.4 capped")
+    assert len(calls) == 2
+
+
+def test_text_cut_short_by_a_budget_is_not_cached(tmp_path, monkeypatch):
+    calls = []
+    cache = ExtractionCache(str(tmp_path))
+    monkeypatch.setattr(resume_core, "get_extraction_cache", lambda: cache)
+    monkeypatch.setattr(resume_core, "extract_text_guarded",
+                        fake_guard("timeout", ["Reading the PDF took longer than 90 seconds."], calls))
+
+    resume_core.extract_text_cached(b"%PDF-1.4 slow")
+    resume_core.extract_text_cached(b"%PDF-1.4 slow")
+    assert len(calls) == 2
@@ -0,0 +1,15 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from pipeline import FutureGroup
+
+
+def test_future_group_cancels_futures_not_started_yet():
+    release = threading.Event()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        running = executor.submit(release.wait, 5)
+        queued = [executor.submit(lambda: "critique") for _ in range(3)]
+        FutureGroup([running, *queued]).cancel()
+        release.set()
+        assert running.result() is True
+        assert all(future.cancelled() for future in queued)
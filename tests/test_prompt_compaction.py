@@ -0,0 +1,59 @@
+from prompt_compaction import compact_text, strip_repeated_lines
+
+TWO_PAGE_RESUME = "\f".join([
+    "\n".join([
+        "Jane Doe - Resume",
+        "9876543210",
+        "jane@example.com",
+        "Experience",
+        "Senior Engineer, Acme",
+        "2021 - 2023",
+        "Built data pipelines in Python and SQL.",
+        "Page 1 of 2",
+    ]),
+    "\n".join([
+        "Jane Doe - Resume",
+        "Skills",
+        "Python, SQL, Spark",
+        "Education",
+        "BSc Computer Science",
+        "2015 - 2019",
+        "Page 2 of 2",
+    ]),
+])
+
+
+def test_contact_details_and_dates_survive():
+    compacted = compact_text(TWO_PAGE_RESUME)
+
+    for line in ("9876543210", "jane@example.com", "2021 - 2023", "2015 - 2019"):
+        assert line in compacted.split("\n")
+
+
+def test_page_markers_and_repeated_header_are_removed():
+    compacted = compact_text(TWO_PAGE_RESUME)
+
+    assert "Page 1 of 2" not in compacted
+    assert "Page 2 of 2" not in compacted
+    assert compacted.count("Jane Doe - Resume") == 1
+
+
+def test_running_header_with_page_number_is_kept_once():
+    text = "Jane Doe - Page 1\nSummary\nEngineer\fJane Doe - Page 2\nSkills\nPython"
+
+    assert strip_repeated_lines(text).split("\n") == ["Jane Doe - Page 1", "Summary", "Engineer", "Skills", "Python"]
+
+
+def test_numbers_that_do_not_fit_the_page_count_are_kept():
+    # "06/2021" is a date in a two-page text, not page 6 of 2021
+    text = "Jane Doe\nEngineer\n06/2021\fSkills\nPython\n3 of 4"
+
+    lines = strip_repeated_lines(text).split("\n")
+    assert "06/2021" in lines
+    assert "3 of 4" in lines
+
+
+def test_single_page_text_is_unchanged():
+    text = "Jane Doe\n9876543210\n2021 - 2023\n1"
+
+    assert strip_repeated_lines(text) == text
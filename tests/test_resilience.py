@@ -0,0 +1,171 @@
+import pytest
+
+from fake_gemini import FakeModel
+from resilience import CallGuard, CircuitBreaker, CircuitOpenError, RateLimitTimeout, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class FlakyModel(FakeModel):
+    # Fails with a transient error until failures runs out, then answers like FakeModel
+    def __init__(self, failures=0, error=ConnectionError):
+        super().__init__("fake", latency=0, chunk_delay=0, chunks=4, output_words=20, sleep=lambda seconds: None)
+        self.failures = failures
+        self.error = error
+        self.calls = 0
+
+    def generate_content(self, contents, stream=False, **kwargs):
+        self.calls += 1
+        if self.failures:
+            self.failures -= 1
+            raise self.error("backend unavailable")
+        return super().generate_content(contents, stream=stream, **kwargs)
+
+
+class EmptyBucket:
+    def acquire(self, timeout=None):
+        raise RateLimitTimeout("Timed out waiting for the Gemini rate limiter")
+
+
+def make_guard(clock, failure_threshold=2, reset_timeout=30.0, max_retries=1, limiter=None):
+    breaker = CircuitBreaker(failure_threshold=failure_threshold, reset_timeout=reset_timeout, clock=clock)
+    limiter = limiter or TokenBucket(1000, 1000, clock=clock, sleep=clock.sleep)
+    return CallGuard(limiter, breaker, max_retries=max_retries, clock=clock, sleep=clock.sleep)
+
+
+def open_circuit(guard, clock):
+    model = FlakyModel(failures=10)
+    while guard.breaker.state != "open":
+        with pytest.raises(ConnectionError):
+            guard.call(lambda: model.generate_content("prompt"))
+    clock.now += guard.breaker.reset_timeout + 1
+
+
+def test_transient_errors_are_retried():
+    clock = FakeClock()
+    guard = make_guard(clock, failure_threshold=5, max_retries=3)
+    model = FlakyModel(failures=2)
+
+    response = guard.call(lambda: model.generate_content("prompt"))
+
+    assert response.text.startswith("1. OVERALL IMPRESSION")
+    assert model.calls == 3
+    assert guard.stats["retries"] == 2
+    assert guard.breaker.state == "closed"
+
+
+def test_non_transient_errors_are_not_retried():
+    clock = FakeClock()
+    guard = make_guard(clock)
+    model = FlakyModel(failures=1, error=ValueError)
+
+    with pytest.raises(ValueError):
+        guard.call(lambda: model.generate_content("prompt"))
+
+    assert model.calls == 1
+    assert guard.breaker.state == "closed"
+
+
+def test_circuit_opens_and_fails_fast():
+    clock = FakeClock()
+    guard = make_guard(clock, failure_threshold=2)
+    model = FlakyModel(failures=10)
+
+    with pytest.raises(ConnectionError):
+        guard.call(lambda: model.generate_content("prompt"))
+    calls = model.calls
+    with pytest.raises(CircuitOpenError):
+        guard.call(lambda: model.generate_content("prompt"))
+
+    assert guard.breaker.state == "open"
+    assert model.calls == calls
+    assert guard.stats["rejected"] == 1
+
+
+def test_half_open_trial_success_closes_circuit():
+    clock = FakeClock()
+    guard = make_guard(clock)
+    open_circuit(guard, clock)
+
+    guard.call(lambda: FlakyModel().generate_content("prompt"))
+
+    assert guard.breaker.state == "closed"
+
+
+def test_half_open_trial_failure_reopens_circuit():
+    clock = FakeClock()
+    guard = make_guard(clock, max_retries=0)
+    open_circuit(guard, clock)
+
+    with pytest.raises(ConnectionError):
+        guard.call(lambda: FlakyModel(failures=1).generate_content("prompt"))
+
+    assert guard.breaker.state == "open"
+
+
+def test_only_one_trial_while_half_open():
+    clock = FakeClock()
+    guard = make_guard(clock)
+    open_circuit(guard, clock)
+    model = FlakyModel()
+
+    stream = guard.stream(lambda: model.generate_content("prompt", stream=True))
+    next(stream)
+    with pytest.raises(CircuitOpenError):
+        guard.call(lambda: model.generate_content("prompt"))
+    list(stream)
+
+    assert guard.breaker.state == "closed"
+
+
+def test_cancelled_trial_stream_does_not_block_later_calls():
+    clock = FakeClock()
+    guard = make_guard(clock)
+    open_circuit(guard, clock)
+
+    stream = guard.stream(lambda: FlakyModel().generate_content("prompt", stream=True))
+    next(stream)
+    # The user cancels while the trial is still streaming
+    stream.close()
+
+    assert guard.breaker.state == "closed"
+    guard.call(lambda: FlakyModel().generate_content("prompt"))
+
+
+def test_abandoned_trial_expires_after_reset_timeout():
+    clock = FakeClock()
+    guard = make_guard(clock)
+    open_circuit(guard, clock)
+
+    stream = guard.stream(lambda: FlakyModel().generate_content("prompt", stream=True))
+    next(stream)
+    # Never finished or closed: other calls wait one reset_timeout, then get a new trial
+    with pytest.raises(CircuitOpenError):
+        guard.call(lambda: FlakyModel().generate_content("prompt"))
+    clock.now += guard.breaker.reset_timeout + 1
+
+    guard.call(lambda: FlakyModel().generate_content("prompt"))
+    assert guard.breaker.state == "closed"
+
+
+def test_rate_limit_timeout_leaves_breaker_unchanged():
+    clock = FakeClock()
+    guard = make_guard(clock, limiter=EmptyBucket())
+    guard.breaker.state = "open"
+    guard.breaker._opened_at = clock() - guard.breaker.reset_timeout
+
+    with pytest.raises(RateLimitTimeout):
+        guard.call(lambda: FlakyModel().generate_content("prompt"))
+
+    # The trial was handed back, so the next call may try again
+    assert guard.breaker.state == "open"
+    assert guard.breaker.before_call() is True
@@ -0,0 +1,37 @@
+from resume_sections import ResumeVersionStore, heading_of, resume_owner, split_sections
+
+RESUME = "Jane Doe\njane@example.com\nExperience\nBuilt a billing service\nEducation\nBSc Computer Science\nSkills\nPython, SQL"
+
+
+def test_versions_are_only_matched_within_their_owner(tmp_path):
+    store = ResumeVersionStore(str(tmp_path / "versions.sqlite3"))
+    sections = split_sections(RESUME)
+    store.add(sections, "session-a")
+
+    revised = split_sections(RESUME.replace("Python, SQL", "Python, SQL, Go"))
+    assert store.find_previous(revised, "session-a") == {s["key"]: s["fingerprint"] for s in sections}
+    assert store.find_previous(revised, "session-b") is None
+
+
+def test_identical_versions_are_stored_per_owner(tmp_path):
+    store = ResumeVersionStore(str(tmp_path / "versions.sqlite3"))
+    sections = split_sections(RESUME)
+    store.add(sections, "session-a")
+    store.add(sections, "session-b")
+    assert store.find_previous(sections, "session-b") is not None
+
+
+def test_owner_is_the_contact_details():
+    revised = split_sections(RESUME.replace("Python, SQL", "Python, SQL, Go"))
+    assert resume_owner(revised) == resume_owner(split_sections(RESUME))
+    other = split_sections(RESUME.replace("Jane Doe\njane@example.com", "John Roe\njohn@example.com"))
+    assert resume_owner(other) != resume_owner(revised)
+    assert resume_owner(split_sections("Experience\nBuilt things")) is None
+
+
+def test_only_heading_like_colon_lines_start_sections():
+    assert heading_of("Tools:") is None
+    assert heading_of("Technologies used:") is None
+    assert heading_of("OPEN SOURCE:") == ("open_source", "OPEN SOURCE")
+    assert heading_of("Side Projects:") == ("side_projects", "Side Projects")
+    assert heading_of("Experience") == ("experience", "Experience")
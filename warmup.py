@@ -0,0 +1,123 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import importlib
+import threading
+import subprocess
+
+# Warm-up for new replicas.
+# The app imports its heavy dependencies lazily so the first page renders
+# quickly. Run this at container start (or set WARMUP_ON_START=1 to run it in a
+# background thread of the app) to load them ahead of the first upload and to
+# fail fast when the Tesseract or Poppler binaries are missing.
+#
+#   python warmup.py              # prints a JSON report, exit code 1 on a problem
+#   python warmup.py --prebuild   # also configures the Gemini SDK and builds the model
+#
+# Compare startup cost with: python -X importtime main.py 2> importtime.log
+
+HEAVY_MODULES = ["PIL.Image", "numpy", "pdfplumber", "pdf2image", "pytesseract", "google.generativeai"]
+
+_report = None
+_started = False
+_lock = threading.Lock()
+
+
+# Function to import each module and record how long it took
+def time_imports(modules=HEAVY_MODULES):
+    timings = {}
+    for name in modules:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+            timings[name] = {"ok": True, "seconds": round(time.perf_counter() - start, 3)}
+        except Exception as e:
+            timings[name] = {"ok": False, "seconds": round(time.perf_counter() - start, 3), "error": str(e)}
+    return timings
+
+
+# Function to check the external binaries OCR depends on; values are None when missing
+def check_binaries():
+    binaries = {"tesseract": None, "pdftoppm": None}
+    try:
+        import pytesseract
+        binaries["tesseract"] = str(pytesseract.get_tesseract_version())
+    except Exception:
+        pass
+
+    pdftoppm = shutil.which("pdftoppm")
+    if pdftoppm:
+        try:
+            # pdftoppm prints its version to stderr
+            output = subprocess.run([pdftoppm, "-v"], capture_output=True, text=True, timeout=10)
+            binaries["pdftoppm"] = (output.stderr or output.stdout).strip().splitlines()[0]
+        except (OSError, subprocess.SubprocessError, IndexError):
+            binaries["pdftoppm"] = pdftoppm
+    return binaries
+
+
+# Function to run the warm-up; returns the report
+def warm_up(prebuild=False):
+    start = time.perf_counter()
+    report = {"imports": time_imports(), "binaries": check_binaries()}
+    if prebuild:
+        model_start = time.perf_counter()
+        try:
+            from gemini_client import get_model
+            get_model()
+            report["model"] = {"ok": True, "seconds": round(time.perf_counter() - model_start, 3)}
+        except Exception as e:
+            report["model"] = {"ok": False, "error": str(e)}
+    report["seconds"] = round(time.perf_counter() - start, 3)
+    report["ok"] = (
+        all(timing["ok"] for timing in report["imports"].values())
+        and all(report["binaries"].values())
+        and report.get("model", {"ok": True})["ok"]
+    )
+    return report
+
+
+def _run_in_background(prebuild):
+    global _report
+    report = warm_up(prebuild)
+    _report = report
+    if not report["ok"]:
+        print(f"Warm-up found problems: {json.dumps(report)}")
+
+
+# Function to start the warm-up once per process when WARMUP_ON_START=1
+def start_background_warmup():
+    global _started
+    if os.getenv("WARMUP_ON_START", "0") != "1":
+        return
+    with _lock:
+        if _started:
+            return
+        _started = True
+    prebuild = os.getenv("WARMUP_PREBUILD_MODEL", "0") == "1"
+    threading.Thread(target=_run_in_background, args=(prebuild,), name="warmup", daemon=True).start()
+
+
+# Report of the background warm-up, or None while it is still running
+def get_warmup_report():
+    return _report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Preload heavy dependencies and check OCR binaries.")
+    parser.add_argument("--prebuild", action="store_true", help="also configure Gemini and build the default model")
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    report = warm_up(args.prebuild)
+    print(json.dumps(report, indent=2))
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())